@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import traceback
+from multiprocessing import Pool, cpu_count
+
+from models.game import GameException
+from techon import GameHandler
+
+
+def solveLevel(job):
+    """Solve one level in a worker process and report how it went."""
+    inputFile, outputDir, engine = job
+    name = os.path.basename(inputFile)
+    result = {'name': name, 'status': 'ok', 'life': None, 'money': None, 'frames': None}
+
+    start = time.time()
+    try:
+        game = GameHandler(inputFile=inputFile, outputFile=os.path.join(outputDir, '%s_solution' % name), engine=engine)
+        result['life'], result['money'], result['frames'] = game.findSolution()
+    except GameException as e:
+        result['status'] = 'failed: %s' % e.message
+    except Exception:
+        result['status'] = 'error: %s' % traceback.format_exc().strip().split('\n')[-1]
+    result['seconds'] = time.time() - start
+
+    return result
+
+
+def solveDirectory(inputDir, outputDir='output', engine='object', jobs=None):
+    """Solve every level file in `inputDir` in parallel, results sorted by
+    name. `outputDir` is created if it does not exist."""
+    jobs = jobs or cpu_count()
+    levels = sorted(name for name in os.listdir(inputDir)
+                    if os.path.isfile(os.path.join(inputDir, name)) and not name.startswith('.') and not name.endswith('.cache'))
+
+    work = [(os.path.join(inputDir, name), outputDir, engine) for name in levels]
+    if not os.path.isdir(outputDir):
+        os.makedirs(outputDir)
+
+    pool = Pool(processes=min(jobs, len(work)) or 1)
+    try:
+        results = pool.map(solveLevel, work, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+
+def printSummary(results):
+    print '\t'.join(['level', 'life', 'money', 'frames', 'seconds', 'status'])
+    for result in results:
+        print '\t'.join([
+            result['name'],
+            '%s' % result['life'], '%s' % result['money'], '%s' % result['frames'],
+            '%.3f' % result['seconds'], result['status'],
+        ])
+
+
+if __name__ == '__main__':
+    # python batch.py <input dir> [--output=dir] [--engine=object|numpy] [--jobs=N]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+
+    if len(args) == 0:
+        print 'No input directory'
+    else:
+        started = time.time()
+        results = solveDirectory(
+            args[0],
+            outputDir=options.get('output', 'output'),
+            engine=options.get('engine', 'object'),
+            jobs=int(options['jobs']) if 'jobs' in options else None,
+        )
+        printSummary(results)
+        print 'total %.3f seconds' % (time.time() - started)
@@ -0,0 +1,122 @@
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from models.colors import colorPalette
+from models.game import Tower
+from models.generator import writeLevel
+from models.placement import FixedStrategy
+from techon import GameHandler
+
+# name: generateLevel arguments
+SCALES = [
+    ('small', dict(width=15, height=15, bugs=50, colors=3)),
+    ('medium', dict(width=40, height=40, bugs=500, colors=4)),
+    ('large', dict(width=80, height=80, bugs=2000, colors=5)),
+]
+
+
+class TimedGameHandler(GameHandler):
+    """GameHandler that records how long each setup phase takes."""
+
+    def __init__(self, *args, **kwargs):
+        self.timings = {}
+        super(TimedGameHandler, self).__init__(*args, **kwargs)
+
+    def _timed(self, phase, method):
+        start = time.time()
+        method()
+        self.timings[phase] = time.time() - start
+
+    def _readInputFile(self):
+        self._timed('parse', super(TimedGameHandler, self)._readInputFile)
+
+    def _buildRoad(self):
+        self._timed('road', super(TimedGameHandler, self)._buildRoad)
+
+    def _getBestTowerPositions(self):
+        self._timed('positions', super(TimedGameHandler, self)._getBestTowerPositions)
+
+
+def benchmarkTowers(game, count):
+    """`count` towers on the best covering cells, colored from the palette,
+    at most as many as the level's money buys."""
+    if game.towerCost > 0:
+        count = min(count, game.money // game.towerCost)
+    bugs = sorted(game.bugs.itervalues(), key=lambda bug: (bug.frame, bug.name))
+    palette = colorPalette([(bug.name, bug.colors) for bug in bugs]) or [{}]
+    positions = game.bestTowerPositions[::-1][:count]
+    return [Tower('tower_%s' % i, 0, x, y, dict(palette[i % len(palette)])) for i, (x, y) in enumerate(positions)]
+
+
+def runBenchmark(name, params, seed=0, towers=5, engine='object', simulation='frames', directory=None):
+    """Generate one level and time every phase of solving and validating it."""
+    directory = directory or tempfile.mkdtemp(prefix='techon-bench-')
+    inputFile = os.path.join(directory, '%s_%s.txt' % (name, seed))
+    outputFile = inputFile + '_solution'
+    writeLevel(inputFile, seed=seed, **params)
+
+    game = TimedGameHandler(inputFile=inputFile, outputFile=outputFile, engine=engine, simulation=simulation,
+                            strategy=FixedStrategy([]))
+    game.strategy = FixedStrategy(benchmarkTowers(game, towers))
+
+    start = time.time()
+    life, money, frames = game.findSolution()
+    game.timings['solve'] = time.time() - start
+
+    start = time.time()
+    game.validateOutput()
+    game.timings['validate'] = time.time() - start
+
+    return {
+        'scale': name, 'seed': seed, 'params': params, 'towers': len(game.strategy.towers),
+        'engine': engine, 'simulation': simulation,
+        'bugs': len(game.level.names), 'road': len(game.road), 'frames': frames,
+        'life': life, 'money': money,
+        'timings': game.timings,
+    }
+
+
+def runBenchmarks(scales=SCALES, seed=0, towers=5, engine='object', simulation='frames'):
+    directory = tempfile.mkdtemp(prefix='techon-bench-')
+    try:
+        results = [runBenchmark(name, params, seed, towers, engine, simulation, directory) for name, params in scales]
+    finally:
+        shutil.rmtree(directory)
+
+    return {
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    # python benchmark.py [--scales=small,medium] [--seed=N] [--towers=N] [--engine=object|numpy]
+    #                     [--simulation=frames|events] [--output=results.json]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+
+    names = options['scales'].split(',') if 'scales' in options else [name for name, _ in SCALES]
+    scales = [(name, params) for name, params in SCALES if name in names]
+
+    report = runBenchmarks(
+        scales,
+        seed=int(options.get('seed', 0)),
+        towers=int(options.get('towers', 5)),
+        engine=options.get('engine', 'object'),
+        simulation=options.get('simulation', 'frames'),
+    )
+
+    phases = ['parse', 'road', 'positions', 'solve', 'validate']
+    print '\t'.join(['scale', 'bugs', 'road', 'frames'] + phases)
+    for result in report['results']:
+        print '\t'.join(['%s' % result[key] for key in ('scale', 'bugs', 'road', 'frames')] +
+                        ['%.3f' % result['timings'][phase] for phase in phases])
+
+    if 'output' in options:
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
@@ -0,0 +1,184 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from benchmark import benchmarkTowers
+from models.game import GameException, Tower
+from models.generator import writeLevel
+from models.placement import FixedStrategy
+from models.shots import NEVER, ALWAYS
+from models.strategy import loadStrategy
+from techon import GameHandler
+
+# name: generateLevel arguments of the generated levels checked next to the given ones
+LEVELS = [
+    ('snake', dict(width=15, height=15, bugs=60, colors=3)),
+    ('walk', dict(width=20, height=20, bugs=80, colors=4, shape='walk')),
+]
+
+RUNS = [(engine, simulation) for engine in ('object', 'numpy') for simulation in ('frames', 'events')]
+
+
+def solve(inputFile, outputFile, engine, simulation, strategy):
+    """(life, money, frames) or the game over message, and the solution written."""
+    game = GameHandler(inputFile=inputFile, outputFile=outputFile, engine=engine, simulation=simulation,
+                       strategy=strategy)
+    try:
+        result = game.findSolution()
+    except GameException as e:
+        result = e.message
+
+    solution = None
+    if os.path.isfile(outputFile):
+        with open(outputFile, 'rb') as f:
+            solution = f.read()
+        os.remove(outputFile)
+
+    return result, solution
+
+
+def checkSimulations(inputFile, directory, towers=None):
+    """Every engine and simulation plays the level like object frames does."""
+    failures = []
+    outputFile = os.path.join(directory, 'solution')
+
+    # one strategy for every run, a placement search is only done once
+    strategy = FixedStrategy(towers) if towers is not None else loadStrategy(inputFile)
+
+    expected = None
+    for engine, simulation in RUNS:
+        result = solve(inputFile, outputFile, engine, simulation, strategy)
+        if expected is None:
+            expected = result
+        elif result != expected:
+            failures.append('%s %s: %s instead of %s' % (engine, simulation, result[0], expected[0]))
+
+    return failures
+
+
+def checkTimeline(game, positions=30):
+    """`timeline.exposed` against walking every bug down the road frame by frame."""
+    failures = []
+    road = game.road
+    end = len(road) + max(game.level.frames) + 1
+
+    for x, y in game.bestTowerPositions[-positions:]:
+        for frame in xrange(end + 1):
+            found = sorted(game.timeline.exposed(x, y, frame))
+
+            expected = []
+            for name, spawn in zip(game.level.names, game.level.frames):
+                steps = frame - spawn + 1
+                # the exit X is no longer in range
+                if steps < 1 or steps >= len(road):
+                    continue
+                i, j = road.cells[steps - 1]
+                if max(abs(i - x), abs(j - y)) <= game.towerRange:
+                    expected.append(name)
+            expected.sort()
+
+            if found != expected:
+                failures.append('%s,%s at frame %s: %s instead of %s' % (y, x, frame, found, expected))
+
+    return failures
+
+
+def shootUntilDead(game, tower, bug):
+    """(shots, collateral, clean) of `tower` shooting `bug` one shot at a time."""
+    health = game.health
+    saved = health.snapshotRow(bug.row)
+
+    try:
+        shots = collateral = 0
+        while bug.life > 0:
+            before = health.row(bug.row)
+            collateral += game.shootBug(tower, bug, True)
+            shots += 1
+            if health.row(bug.row) == before:
+                # health left in colors the tower does not fire
+                shots = collateral = NEVER
+                break
+        health.restoreRow(saved)
+
+        clean = 0
+        while True:
+            before = health.row(bug.row)
+            if game.shootBug(tower, bug, True) > 0:
+                break
+            if health.row(bug.row) == before:
+                # fires nothing at all
+                clean = ALWAYS
+                break
+            clean += 1
+    finally:
+        health.restoreRow(saved)
+
+    return shots, collateral, clean
+
+
+def checkShotMatrix(game, towers):
+    """`shotMatrix` against repeated `shootBug`."""
+    failures = []
+    names, bugs, shots, collateral, clean = game.shotMatrix(towers)
+
+    for i, tower in enumerate(towers):
+        for j, name in enumerate(bugs):
+            bug = game.bugs[name]
+            expected = shootUntilDead(game, tower, bug)
+            found = (int(shots[i, j]), int(collateral[i, j]), int(clean[i, j]))
+            if found != expected:
+                failures.append('tower %s bug %s: %s instead of %s' % (tower.name, name, found, expected))
+
+    return failures
+
+
+def randomTowers(game, count, seed=0):
+    """Towers firing random colors of the level, one of them a color no bug has."""
+    rand = random.Random(seed)
+    towers = []
+    for i in xrange(count):
+        colors = dict((color, rand.randint(0, 300)) for color in rand.sample(game.colors, min(len(game.colors), 3)))
+        if i == 0:
+            colors['none'] = 1
+        towers.append(Tower('check_%s' % i, 0, 0, 0, colors))
+    return towers
+
+
+def runChecks(levels):
+    directory = tempfile.mkdtemp(prefix='techon-checks-')
+    failed = 0
+    try:
+        generated = []
+        for name, params in LEVELS:
+            path = os.path.join(directory, '%s.txt' % name)
+            writeLevel(path, seed=0, **params)
+            generated.append(path)
+
+        for path in list(levels) + generated:
+            game = GameHandler(inputFile=path, outputFile=os.path.join(directory, 'solution'), strategy=FixedStrategy([]))
+            towers = benchmarkTowers(game, 5) if path in generated else None
+
+            checks = [
+                ('simulations', lambda: checkSimulations(path, directory, towers)),
+                ('timeline', lambda: checkTimeline(game)),
+                ('shot matrix', lambda: checkShotMatrix(game, randomTowers(game, 4) + (towers or []))),
+            ]
+            for check, run in checks:
+                failures = run()
+                failed += len(failures)
+                print '%s\t%s\t%s' % (os.path.basename(path), check, 'ok' if not failures else 'FAILED')
+                for failure in failures[:10]:
+                    print '\t%s' % failure
+    finally:
+        shutil.rmtree(directory)
+
+    return failed
+
+
+if __name__ == '__main__':
+    # python checks.py [level ...], every file in input/ by default
+    levels = sys.argv[1:] or sorted(os.path.join('input', name) for name in os.listdir('input')
+                                    if not name.startswith('.') and not name.endswith('.cache'))
+    sys.exit(1 if runChecks(levels) else 0)
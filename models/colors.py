@@ -0,0 +1,92 @@
+from fractions import gcd
+
+MAX_DAMAGE = 100000
+MAX_COLORS = 5
+
+
+def _direction(colors):
+    """(unit vector, multiple) with colors == multiple * unit, unit primitive."""
+    items = sorted((color, value) for color, value in colors.iteritems() if value > 0)
+    multiple = reduce(gcd, (value for _, value in items), 0)
+    if multiple == 0:
+        return None, 0
+    return tuple((color, value // multiple) for color, value in items), multiple
+
+
+def _largestDivisor(n, limit):
+    """Largest divisor of `n` that is at most `limit`, 0 if there is none."""
+    best = 0
+    i = 1
+    while i * i <= n:
+        if n % i == 0:
+            if i <= limit and i > best:
+                best = i
+            if n // i <= limit and n // i > best:
+                best = n // i
+        i += 1
+    return best
+
+
+def solveColors(targets, shots=None, cap=MAX_DAMAGE, colorLimit=MAX_COLORS):
+    """Damage vector that kills the most life among `targets` with no
+    collateral, as `(colors, killed)`.
+
+    `targets` are `(name, colors)` pairs of full health. A tower firing `d`
+    only hurts a bug without collateral if every color of `d` is at most what
+    the bug has left, and it only finishes the bug if all those colors run
+    out together, so a bug is killed exactly when its health is `k * d` for
+    some number of shots `k`. Bugs are grouped by the primitive direction of
+    their health; within a group `d = t * unit` works for every `t` dividing
+    all the bugs' multiples, the largest such `t` within `cap` needing the
+    fewest shots. With `shots`, no bug may need more than that many. Returns
+    `(None, [])` if no target can be killed that way.
+    """
+    groups = {}
+    for name, colors in targets:
+        unit, multiple = _direction(colors)
+        if unit is None or len(unit) > colorLimit:
+            continue
+        groups.setdefault(unit, []).append((multiple, name))
+
+    best = (0, None, [])
+    for unit, members in sorted(groups.iteritems()):
+        limit = cap // max(value for _, value in unit)
+        if limit == 0:
+            continue
+
+        # biggest bugs first, each kept only if the group stays killable
+        common = 0
+        step = 0
+        killed = []
+        total = 0
+        for multiple, name in sorted(members, reverse=True):
+            candidate = _largestDivisor(gcd(common, multiple), limit)
+            if candidate == 0:
+                continue
+            if shots is not None and any(m // candidate > shots for m, _ in killed + [(multiple, name)]):
+                continue
+            common = gcd(common, multiple)
+            step = candidate
+            killed.append((multiple, name))
+            total += multiple * sum(value for _, value in unit)
+
+        if total > best[0]:
+            best = (total, dict((color, value * step) for color, value in unit), [name for _, name in killed])
+
+    return best[1], best[2]
+
+
+def colorPalette(targets, shots=None, cap=MAX_DAMAGE, colorLimit=MAX_COLORS):
+    """Distinct `solveColors` vectors that together kill as many `targets`
+    as possible, the one killing the most life first."""
+    targets = list(targets)
+    palette = []
+    while targets:
+        colors, killed = solveColors(targets, shots, cap, colorLimit)
+        if colors is None:
+            break
+        palette.append(colors)
+        killed = set(killed)
+        targets = [target for target in targets if target[0] not in killed]
+
+    return palette
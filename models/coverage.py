@@ -0,0 +1,83 @@
+from bisect import bisect_left, bisect_right
+
+
+class Coverage(object):
+    """Which road cells a tower on each buildable `'0'` cell can hit.
+
+    Built once per map. Road cells are given as step counts, the `bug.steps`
+    of a bug standing on them; the exit `X` is left out since bugs on it can
+    no longer be shot.
+
+    `counts[(x, y)]` is the number of road cells covered from (x, y), computed
+    from 2-D prefix sums of the road mask. `steps[(x, y)]` is the sorted list
+    of those cells and `towers[step]` the inverse: the buildable cells that
+    cover a road cell.
+    """
+
+    def __init__(self, table, road, towerRange):
+        self.towerRange = towerRange
+        self.road = road
+        self.counts = {}
+        self.steps = {}
+        self.towers = {}
+
+        height = len(table)
+        width = len(table[0]) if height > 0 else 0
+        shootable = road.cells[:-1]
+
+        # prefix[i][j] = road cells in table[:i][:j]
+        mask = [[0] * width for _ in xrange(height)]
+        for x, y in shootable:
+            mask[x][y] = 1
+        prefix = [[0] * (width + 1) for _ in xrange(height + 1)]
+        for i in xrange(height):
+            row, above, current = mask[i], prefix[i], prefix[i + 1]
+            total = 0
+            for j in xrange(width):
+                total += row[j]
+                current[j + 1] = above[j + 1] + total
+
+        # road cells of every table row, sorted by column
+        columns = [[] for _ in xrange(height)]
+        for step, (x, y) in enumerate(shootable):
+            columns[x].append((y, step + 1))
+        for row in columns:
+            row.sort()
+        keys = [[y for y, _ in row] for row in columns]
+
+        for i in xrange(height):
+            top, bottom = max(0, i - towerRange), min(height, i + towerRange + 1)
+            for j in xrange(width):
+                if table[i][j] != '0':
+                    continue
+
+                left, right = max(0, j - towerRange), min(width, j + towerRange + 1)
+                count = prefix[bottom][right] - prefix[top][right] - prefix[bottom][left] + prefix[top][left]
+                if count == 0:
+                    continue
+
+                steps = []
+                for row in xrange(top, bottom):
+                    start = bisect_left(keys[row], left)
+                    end = bisect_right(keys[row], right - 1)
+                    steps.extend(step for _, step in columns[row][start:end])
+                steps.sort()
+
+                self.counts[(i, j)] = count
+                self.steps[(i, j)] = steps
+                for step in steps:
+                    try:
+                        self.towers[step].append((i, j))
+                    except KeyError:
+                        self.towers[step] = [(i, j)]
+
+    def ranked(self):
+        """Buildable cells that cover the road, least covering first."""
+        return sorted(self.counts, key=lambda position: (self.counts[position], position))
+
+    def reach(self, x, y):
+        """Step counts a tower at (x, y) can hit, for any position."""
+        try:
+            return self.steps[(x, y)]
+        except KeyError:
+            return self.road.reach(x, y, self.towerRange)
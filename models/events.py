@@ -0,0 +1,44 @@
+import sys
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING}
+
+
+class EventLog(object):
+    """Pluggable sink for structured game events, off by default.
+
+    Events are a name plus keyword fields, e.g. `shot frame=3 tower=t0
+    bug=B1 life=12`. Only events at or above `level` are emitted, either as
+    one compact line on `stream` or by calling `sink(level, event, fields)`.
+    Hot paths check `enabled` first, so a disabled log costs one comparison
+    and never formats anything.
+    """
+
+    def __init__(self, level=None, stream=None, sink=None):
+        self.level = level
+        self.stream = stream if stream is not None or sink is not None else sys.stdout
+        self.sink = sink
+
+    def enabled(self, level):
+        return self.level is not None and level >= self.level
+
+    def emit(self, level, event, **fields):
+        if not self.enabled(level):
+            return
+
+        if self.sink is not None:
+            self.sink(level, event, fields)
+        else:
+            self.stream.write('%s %s\n' % (event, ' '.join('%s=%s' % item for item in sorted(fields.iteritems()))))
+
+    def debug(self, event, **fields):
+        self.emit(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.emit(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.emit(WARNING, event, **fields)
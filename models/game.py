@@ -1,21 +1,41 @@
 import json
-from copy import deepcopy
+from array import array
+
+from models.health import HealthMatrix, HealthRow
 
 class GameException(Exception):
     pass
 
 class GameObject(object):
+    # slotted, no per-instance __dict__: `fields` are the attributes written
+    # by toDict/repr, every slot is pickled
+    __slots__ = ()
+    fields = ()
+
     def __init__(self):
         # import ipdb; ipdb.set_trace()
         pass
 
+    def toDict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
     def __repr__(self):
-        return json.dumps(vars(self))
+        return json.dumps(self.toDict(), default=dict)
 
     def __str__(self):
-        return json.dumps(vars(self))
+        return json.dumps(self.toDict(), default=dict)
 
 class Tower(GameObject):
+    __slots__ = ('name', 'frame', 'x', 'y', 'colors')
+    fields = __slots__
+
     def __init__(self, name=None, frame=None, x=None, y=None, colors=None):
         self.name = name
         self.frame = frame
@@ -29,18 +49,55 @@ class Tower(GameObject):
         super(Tower, self).__init__()
 
 
+class StepTable(object):
+    """Moves made by every bug as one flat array, one slot per bug.
+
+    The step counters of a game live side by side like the health in a
+    `HealthMatrix`, so a snapshot copies them in one go.
+    """
+
+    def __init__(self):
+        self.steps = array('l')
+
+    def __repr__(self):
+        return 'StepTable(%s)' % len(self.steps)
+
+    def addSlot(self):
+        self.steps.append(0)
+        return len(self.steps) - 1
+
+    def snapshot(self):
+        return self.steps[:]
+
+    def restore(self, snapshot):
+        self.steps[:] = snapshot
+
+
 class Bug(GameObject):
-    def __init__(self, name=None, frame=None, x=None, y=None, colors=None, road=None):
+    __slots__ = ('name', 'frame', 'road', 'stepTable', 'slot', 'health', 'row', 'colors')
+    fields = ('name', 'frame', 'x', 'y', 'steps', 'colors')
+
+    def __init__(self, name=None, frame=None, colors=None, road=None, health=None, stepTable=None):
         self.name = name
         self.frame = frame
-        self.x = x
-        self.y = y
-        self.steps = 0
-        self.road = deepcopy(road)
-        if colors is None:
-            self.colors = {}
-        else:
-            self.colors = colors
+        # the road is immutable and shared by reference between all bugs
+        self.road = road
+
+        # moves are a slot of a flat table shared by all bugs of a game, the
+        # position follows from them
+        if stepTable is None:
+            stepTable = StepTable()
+        self.stepTable = stepTable
+        self.slot = stepTable.addSlot()
+
+        # health is a row of a bugs x colors matrix, shared by all bugs of a game
+        if health is None:
+            health = HealthMatrix()
+        self.health = health
+        self.row = health.addRow()
+        self.colors = HealthRow(health, self.row)
+        if colors is not None:
+            self.colors.update(colors)
 
         super(Bug, self).__init__()
 
@@ -50,22 +107,60 @@ class Bug(GameObject):
 
     @property
     def life(self):
-        return sum([value for key, value in self.colors.iteritems()])
+        return self.health.lives[self.row]
+
+    @property
+    def steps(self):
+        return self.stepTable.steps[self.slot]
+
+    @steps.setter
+    def steps(self, steps):
+        self.stepTable.steps[self.slot] = steps
+
+    @property
+    def position(self):
+        steps = self.stepTable.steps[self.slot]
+        if steps <= 0:
+            return None, None
+        return self.road.cells[steps - 1]
+
+    @property
+    def x(self):
+        return self.position[0]
+
+    @property
+    def y(self):
+        return self.position[1]
 
     def move(self, frame):
         if self.frame > frame:
             return
 
-        position = self.road[(self.x, self.y)]
-        self.x = position[0]
-        self.y = position[1]
-        self.steps += 1
+        steps = self.stepTable.steps
+        if steps[self.slot] >= len(self.road):
+            raise KeyError(self.position)
+        steps[self.slot] += 1
+
+    def moveTo(self, frame):
+        """Jump to where `move` leaves the bug once called for every frame
+        up to `frame`."""
+        steps = frame - self.frame + 1
+        if steps <= 0:
+            return
+
+        if steps > len(self.road):
+            raise KeyError(self.position)
+
+        self.stepTable.steps[self.slot] = steps
 
     @property
     def stepsLeft(self):
         return len(self.road) - self.steps
             
 class Shoot(GameObject):
+    __slots__ = ('frame', 'towerName', 'bugName')
+    fields = __slots__
+
     def __init__(self, frame=None, towerName=None, bugName=None):
         self.frame = frame
         self.towerName = towerName
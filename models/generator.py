@@ -0,0 +1,105 @@
+import random
+
+from models.game import GameException
+
+SHAPES = ('snake', 'walk')
+
+
+def _snake(width, height, length):
+    # rows 0, 2, 4... walked alternately left to right and back, joined at the ends
+    cells = []
+    for row in xrange(0, height, 2):
+        columns = xrange(width) if (row // 2) % 2 == 0 else xrange(width - 1, -1, -1)
+        cells.extend((row, column) for column in columns)
+        if row + 2 < height:
+            cells.append((row + 1, cells[-1][1]))
+    return cells[:length]
+
+
+def _walk(width, height, length, rand, attempts=20):
+    # random walks that never touch themselves, the longest one is kept
+    best = []
+    for _ in xrange(attempts):
+        cells = [(rand.randrange(height), 0)]
+        used = set(cells)
+        while len(cells) < length:
+            x, y = cells[-1]
+            moves = []
+            for i, j in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= i < height and 0 <= j < width) or (i, j) in used:
+                    continue
+                touching = [(a, b) for a, b in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)) if (a, b) in used]
+                if touching == [(x, y)]:
+                    moves.append((i, j))
+            if not moves:
+                break
+            cell = rand.choice(moves)
+            cells.append(cell)
+            used.add(cell)
+
+        if len(cells) > len(best):
+            best = cells
+        if len(best) >= length:
+            break
+
+    return best
+
+
+def generateLevel(seed=0, width=20, height=20, shape='snake', length=None, bugs=50, colors=3,
+                  towerRange=2, towerCost=10, money=100, reward=1, life=None, spacing=2, bases=4, maxHealth=1000):
+    """Lines of a random but valid level file, the same for the same arguments.
+
+    The road is a `snake` over every other row or a self avoiding random
+    `walk` from the left border, cut to `length` cells. Bug health is a
+    random multiple of one of `bases` random color vectors, so groups of
+    bugs can be killed cleanly by one tower, and bugs spawn every
+    `spacing` frames on average. `life` defaults to more than all bug
+    health together, so a level never ends early.
+    """
+    if shape not in SHAPES:
+        raise GameException('Unknown road shape %s' % shape)
+
+    rand = random.Random(seed)
+    length = length or width * height
+    cells = _snake(width, height, length) if shape == 'snake' else _walk(width, height, length, rand)
+    if len(cells) < 2:
+        raise GameException('No room for a road on a %sx%s table' % (width, height))
+
+    table = [['0'] * width for _ in xrange(height)]
+    for x, y in cells:
+        table[x][y] = '1'
+    table[cells[0][0]][cells[0][1]] = 'E'
+    table[cells[-1][0]][cells[-1][1]] = 'X'
+
+    names = ['c%s' % i for i in xrange(colors)]
+    vectors = [[rand.randint(1, max(1, maxHealth // 5)) for _ in names] for _ in xrange(bases)]
+
+    rows = []
+    frame = 0
+    total = 0
+    for i in xrange(bugs):
+        multiple = rand.randint(1, 5)
+        health = [value * multiple for value in rand.choice(vectors)]
+        total += sum(health)
+        rows.append('B%s %s frame=%s' % (i + 1, ' '.join('%s=%s' % item for item in zip(names, health)), frame))
+        frame += rand.randint(0, 2 * spacing)
+
+    lines = [
+        'starting_life=%s' % (life if life is not None else total + 1),
+        'starting_money=%s' % money,
+        'tower_range=%s' % towerRange,
+        'tower_cost=%s' % towerCost,
+        'reward_per_bug=%s' % reward,
+        '',
+    ]
+    lines.extend(rows)
+    lines.append('')
+    lines.extend(' '.join(row) for row in table)
+
+    return lines
+
+
+def writeLevel(path, **params):
+    """Write `generateLevel(**params)` to `path`."""
+    with open(path, 'w') as f:
+        f.write('\n'.join(generateLevel(**params)) + '\n')
@@ -0,0 +1,330 @@
+from array import array
+from collections import MutableMapping, OrderedDict
+from itertools import izip
+
+
+class HealthMatrix(object):
+    """Health of every bug as a flat bugs x colors integer matrix.
+
+    Color names are interned to column indexes and each bug owns one row.
+    `lives` holds the row totals and is kept up to date on every write, so a
+    bug's life is a single lookup. Every write also stamps the row in
+    `versions` with a clock that never goes back, snapshots included, so
+    equal versions of a row always mean equal health.
+
+    A row only has the colors it was given, or was shot in, like the dict
+    it replaces: `given` holds a bitmask of those columns per row.
+
+    With a `ShotCache` in `shots`, `preview` and `shoot` look outcomes up
+    instead of walking the tower's colors.
+    """
+
+    def __init__(self, colors=(), shots=None):
+        self.colors = []
+        self.colorIndex = {}
+        self.values = array('l')
+        self.lives = array('l')
+        self.versions = array('l')
+        self.given = []
+        self.clock = 0
+        self.shots = shots
+
+        for color in colors:
+            self.intern(color)
+
+    def __repr__(self):
+        return 'HealthMatrix(%s x %s)' % (len(self.lives), len(self.colors))
+
+    @property
+    def width(self):
+        return len(self.colors)
+
+    def intern(self, color):
+        """Column of `color`, adding the column to every row if it is new."""
+        try:
+            return self.colorIndex[color]
+        except KeyError:
+            pass
+
+        width = len(self.colors)
+        if len(self.lives) > 0:
+            values = array('l')
+            for row in xrange(len(self.lives)):
+                values.extend(self.values[row * width : (row + 1) * width])
+                values.append(0)
+            self.values = values
+
+        self.colorIndex[color] = width
+        self.colors.append(color)
+        if self.shots is not None:
+            self.shots.clear()
+        return width
+
+    def addRow(self):
+        self.values.extend([0] * len(self.colors))
+        self.lives.append(0)
+        self.versions.append(0)
+        self.given.append(0)
+        return len(self.lives) - 1
+
+    def touch(self, row):
+        self.clock += 1
+        self.versions[row] = self.clock
+
+    def get(self, row, color):
+        try:
+            return self.values[row * len(self.colors) + self.colorIndex[color]]
+        except KeyError:
+            return 0
+
+    def set(self, row, color, value):
+        column = self.intern(color)
+        i = row * len(self.colors) + column
+        self.lives[row] += value - self.values[i]
+        self.values[i] = value
+        self.given[row] |= 1 << column
+        self.touch(row)
+
+    def has(self, row, color):
+        column = self.colorIndex.get(color)
+        return column is not None and self.given[row] >> column & 1 == 1
+
+    def columns(self, row):
+        """Columns `row` was given, in column order."""
+        given = self.given[row]
+        return [i for i in xrange(len(self.colors)) if given >> i & 1]
+
+    def mask(self, colors):
+        """Bitmask of the columns a tower's `colors` name."""
+        if isinstance(colors, HealthRow) and colors.health is self:
+            return self.given[colors.row]
+
+        mask = 0
+        for color in colors:
+            column = self.colorIndex.get(color)
+            if column is not None:
+                mask |= 1 << column
+        return mask
+
+    def row(self, row):
+        width = len(self.colors)
+        return self.values[row * width : (row + 1) * width]
+
+    def damage(self, colors):
+        """Dense damage vector of a tower's `colors`, plus the damage it
+        deals in colors no bug has (all of which is collateral)."""
+        if isinstance(colors, HealthRow) and colors.health is self:
+            return self.row(colors.row), 0
+
+        vector = [0] * len(self.colors)
+        extra = 0
+        for color, value in colors.iteritems():
+            try:
+                vector[self.colorIndex[color]] = value
+            except KeyError:
+                extra += value
+
+        return vector, extra
+
+    def preview(self, row, colors):
+        """(colateral, life after the shot) without touching the matrix."""
+        if self.shots is not None:
+            colateral, life, _ = self.shots.outcome(self, row, colors)
+            return colateral, life
+
+        vector, colateral = self.damage(colors)
+        values = self.values
+        base = row * len(self.colors)
+        life = self.lives[row]
+
+        for i, value in enumerate(vector):
+            if value:
+                old = values[base + i]
+                if value > old:
+                    colateral += value - old
+                    life -= old
+                else:
+                    life -= value
+
+        return colateral, life
+
+    def shoot(self, row, colors):
+        """Subtract a tower's damage from a row, clipping at zero, and return
+        the collateral."""
+        if self.shots is not None:
+            colateral, life, after = self.shots.outcome(self, row, colors)
+            width = len(self.colors)
+            self.values[row * width : (row + 1) * width] = array('l', after)
+            self.lives[row] = life
+            self.given[row] |= self.mask(colors)
+            self.touch(row)
+            return colateral
+
+        vector, colateral = self.damage(colors)
+        values = self.values
+        base = row * len(self.colors)
+        life = self.lives[row]
+
+        for i, value in enumerate(vector):
+            if value:
+                old = values[base + i]
+                if value > old:
+                    colateral += value - old
+                    value = old
+                values[base + i] = old - value
+                life -= value
+
+        self.lives[row] = life
+        self.given[row] |= self.mask(colors)
+        self.touch(row)
+        return colateral
+
+    def snapshot(self):
+        return self.values[:], self.lives[:], self.versions[:], self.given[:]
+
+    def snapshotRow(self, row):
+        """What `restoreRow` needs to roll one row back, see `snapshot`."""
+        width = len(self.colors)
+        return row, self.values[row * width : (row + 1) * width], self.lives[row], self.versions[row], self.given[row]
+
+    def restore(self, snapshot):
+        values, lives, versions, given = snapshot
+        self.values[:] = values
+        self.lives[:] = lives
+        self.versions[:] = versions
+        self.given[:] = given
+
+    def restoreRow(self, snapshot):
+        row, values, life, version, given = snapshot
+        width = len(self.colors)
+        self.values[row * width : (row + 1) * width] = values
+        self.lives[row] = life
+        self.versions[row] = version
+        self.given[row] = given
+
+
+class ShotCache(object):
+    """Bounded LRU of shot outcomes for a `HealthMatrix`.
+
+    Bugs of a level often share health vectors and a chosen target is
+    previewed before it is shot, so the same (tower damage, bug health)
+    pair keeps coming back. Outcomes are keyed by the dense damage vector
+    of the tower, interned once per colors dict, and the bug's health row
+    as tuples, and hold (colateral, life after, health after). `hits` and
+    `misses` count lookups, see `stats`.
+
+    Interned vectors hold on to their colors dict, so they are kept in an
+    LRU of the same `size` as the outcomes.
+    """
+
+    def __init__(self, size=1 << 12):
+        self.size = size
+        self.entries = OrderedDict()
+        self.vectors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.vectors.clear()
+
+    def vector(self, health, colors):
+        """(damage vector, extra damage) of `colors` as a hashable key."""
+        # towers never change once built, a live health row always might
+        if isinstance(colors, HealthRow):
+            vector, extra = health.damage(colors)
+            return tuple(vector), extra
+
+        interned = self.vectors.pop(id(colors), None)
+        if interned is None or interned[0] is not colors:
+            vector, extra = health.damage(colors)
+            interned = (colors, (tuple(vector), extra))
+            if len(self.vectors) >= self.size:
+                self.vectors.popitem(last=False)
+
+        self.vectors[id(colors)] = interned
+        return interned[1]
+
+    def outcome(self, health, row, colors):
+        """(colateral, life after, health row after) of shooting `row`."""
+        vector, extra = self.vector(health, colors)
+        width = len(health.colors)
+        current = tuple(health.values[row * width : (row + 1) * width])
+        key = (vector, extra, current)
+
+        try:
+            result = self.entries.pop(key)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            colateral = extra
+            after = []
+            for value, old in izip(vector, current):
+                if value > old:
+                    colateral += value - old
+                    after.append(0)
+                else:
+                    after.append(old - value)
+            result = (colateral, sum(after), tuple(after))
+
+            if len(self.entries) >= self.size:
+                self.entries.popitem(last=False)
+
+        self.entries[key] = result
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': float(self.hits) / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'vectors': len(self.vectors),
+            'size': self.size,
+        }
+
+
+class HealthRow(MutableMapping):
+    """Live `{color: health}` view of one row of a `HealthMatrix`."""
+
+    __slots__ = ('health', 'row')
+
+    def __init__(self, health, row):
+        self.health = health
+        self.row = row
+
+    def __getitem__(self, color):
+        if not self.health.has(self.row, color):
+            raise KeyError(color)
+        return self.health.get(self.row, color)
+
+    def __setitem__(self, color, value):
+        self.health.set(self.row, color, value)
+
+    def __delitem__(self, color):
+        if not self.health.has(self.row, color):
+            raise KeyError(color)
+        self.health.set(self.row, color, 0)
+        self.health.given[self.row] &= ~(1 << self.health.colorIndex[color])
+
+    def __iter__(self):
+        colors = self.health.colors
+        return iter([colors[i] for i in self.health.columns(self.row)])
+
+    def __len__(self):
+        return bin(self.health.given[self.row]).count('1')
+
+    def __contains__(self, color):
+        return self.health.has(self.row, color)
+
+    def __repr__(self):
+        return repr(dict(self.iteritems()))
+
+    def iteritems(self):
+        colors = self.health.colors
+        values = self.health.row(self.row)
+        return iter([(colors[i], values[i]) for i in self.health.columns(self.row)])
+
+    def copy(self):
+        return dict(self.iteritems())
@@ -0,0 +1,216 @@
+import marshal
+import os
+from array import array
+
+from models.game import GameException
+from models.road import Road
+from models.sources import openLines
+
+SETTINGS = {
+    'starting_life': 'life',
+    'starting_money': 'money',
+    'tower_range': 'towerRange',
+    'tower_cost': 'towerCost',
+    'reward_per_bug': 'reward',
+}
+
+CELLS = frozenset(['0', '1', 'E', 'X'])
+
+CACHE_VERSION = 'techon-level-1'
+
+
+class Level(object):
+    """A parsed level file.
+
+    Bugs are kept as parallel arrays: `names`, spawn `frames` and a flat
+    `health` matrix of `len(names) x len(colors)` values, colors being
+    interned in the order they first appear.
+    """
+
+    def __init__(self):
+        self.life = 0
+        self.money = 0
+        self.towerRange = 0
+        self.towerCost = 0
+        self.reward = 0
+
+        self.colors = []
+        self.names = []
+        self.frames = array('i')
+        self.health = array('l')
+        self.table = []
+        self.entrance = None
+        self._road = None
+
+    @property
+    def road(self):
+        if self._road is None:
+            self._road = Road.trace(self.table, self.entrance)
+        return self._road
+
+    def bugs(self):
+        """(name, frame, [(color, value), ...]) for every bug, in file order.
+
+        Health is stored dense, so colors a bug has none of are left out.
+        """
+        width = len(self.colors)
+        for i, name in enumerate(self.names):
+            yield name, self.frames[i], [(color, value) for color, value in
+                                         zip(self.colors, self.health[i * width : (i + 1) * width]) if value]
+
+
+def parseLevel(source):
+    """Tokenize the settings, bugs and table sections of a level in one pass.
+
+    `source` is a path, a file-like object or lines, see `openLines`.
+    """
+    with openLines(source) as lines:
+        return _parseLines(lines)
+
+
+def _parseLines(lines):
+    level = Level()
+    colorIndex = {}
+    rows = []
+    section = 0
+    sectionLines = 0
+
+    for number, line in enumerate(lines, 1):
+        tokens = line.split()
+        if not tokens:
+            if sectionLines:
+                section += 1
+                sectionLines = 0
+            continue
+        sectionLines += 1
+
+        if section == 0:
+            key, _, value = line.partition('=')
+            key = key.strip()
+            if key not in SETTINGS:
+                raise GameException('Line %s: unknown setting %s' % (number, key))
+            setattr(level, SETTINGS[key], _int(value, number))
+
+        elif section == 1:
+            frame = tokens[-1].split('=')
+            if len(tokens) < 2 or len(frame) != 2 or frame[0] != 'frame':
+                raise GameException('Line %s: bug %s has no frame' % (number, tokens[0]))
+
+            colors = []
+            for token in tokens[1:-1]:
+                color, _, value = token.partition('=')
+                if not color or not _:
+                    raise GameException('Line %s: bad color %s' % (number, token))
+                if color not in colorIndex:
+                    colorIndex[color] = len(level.colors)
+                    level.colors.append(color)
+                colors.append((colorIndex[color], _int(value, number)))
+
+            level.names.append(tokens[0])
+            level.frames.append(_int(frame[1], number))
+            rows.append(colors)
+
+        elif section == 2:
+            for cell in tokens:
+                if cell not in CELLS:
+                    raise GameException('Line %s: bad table cell %s' % (number, cell))
+            if 'E' in tokens:
+                if level.entrance is not None:
+                    raise GameException('Line %s: second entrance E' % number)
+                level.entrance = (len(level.table), tokens.index('E'))
+            level.table.append(tokens)
+
+        else:
+            raise GameException('Line %s: unexpected section' % number)
+
+    width = len(level.colors)
+    for colors in rows:
+        row = [0] * width
+        for color, value in colors:
+            row[color] = value
+        level.health.extend(row)
+
+    return level
+
+
+def _int(value, number):
+    try:
+        return int(value)
+    except ValueError:
+        raise GameException('Line %s: %s is not a number' % (number, value.strip()))
+
+
+def readLevel(path, cache=False):
+    """Parse the level at `path`, plain, gzip or xz compressed, or from an
+    open file-like object.
+
+    With `cache`, the parsed level of a path, road included, is stored next
+    to the file as `<path>.cache` and reused for as long as the file is
+    unchanged.
+    """
+    if not isinstance(path, basestring):
+        return parseLevel(path)
+
+    cachePath = path + '.cache'
+    if cache:
+        level = loadCache(cachePath, path)
+        if level is not None:
+            return level
+
+    level = parseLevel(path)
+
+    if cache:
+        saveCache(level, cachePath, path)
+    return level
+
+
+def _source(path):
+    stat = os.stat(path)
+    return stat.st_size, int(stat.st_mtime * 1000000)
+
+
+def saveCache(level, cachePath, path):
+    cells = array('i')
+    for x, y in level.road.cells:
+        cells.append(x)
+        cells.append(y)
+
+    data = (
+        CACHE_VERSION, _source(path),
+        (level.life, level.money, level.towerRange, level.towerCost, level.reward),
+        level.colors, level.names, level.frames.tostring(), level.health.tostring(),
+        '\n'.join(' '.join(row) for row in level.table), level.entrance, cells.tostring(),
+    )
+
+    # write next to the cache and rename, readers never see a partial file
+    tempPath = '%s.%s.tmp' % (cachePath, os.getpid())
+    with open(tempPath, 'wb') as f:
+        marshal.dump(data, f)
+    os.rename(tempPath, cachePath)
+
+
+def loadCache(cachePath, path):
+    """The cached level, or None if the cache is missing or stale."""
+    try:
+        with open(cachePath, 'rb') as f:
+            data = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+
+    if data[0] != CACHE_VERSION or tuple(data[1]) != _source(path):
+        return None
+
+    level = Level()
+    (_, _, settings, level.colors, level.names, frames, health,
+     table, entrance, cells) = data
+    level.life, level.money, level.towerRange, level.towerCost, level.reward = settings
+    level.frames.fromstring(frames)
+    level.health.fromstring(health)
+    level.table = [row.split() for row in table.split('\n')]
+    level.entrance = tuple(entrance)
+
+    flat = array('i')
+    flat.fromstring(cells)
+    level._road = Road(zip(flat[::2], flat[1::2]))
+
+    return level
@@ -0,0 +1,158 @@
+import math
+import random
+
+from models.colors import colorPalette
+from models.game import Tower
+from models.strategy import Strategy
+
+
+class FixedStrategy(Strategy):
+    """Builds a fixed list of towers before the first frame and shoots
+    whatever `GameHandler.planShots` picks."""
+
+    def __init__(self, towers):
+        self.towers = towers
+
+    def placeTowers(self, game):
+        return list(self.towers)
+
+
+class PlacementStrategy(Strategy):
+    """Plays levels without a hand written strategy: the towers come from
+    a `PlacementOptimizer` search, run once on the first `placeTowers`."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.towers = None
+
+    def placeTowers(self, game):
+        if self.towers is None:
+            self.towers = PlacementOptimizer(game, **self.options).optimize()
+        return list(self.towers)
+
+
+class PlacementOptimizer(object):
+    """Searches tower positions and colors for a level.
+
+    A layout is a set of (position, palette index) pairs, positions taken
+    from the best covering cells of `game.bestTowerPositions` and colors
+    from the zero collateral vectors of `colorPalette`, at most as many towers
+    as the starting money buys. Layouts are scored by (life, money) at the
+    end of a headless `game.simulate`, seeded greedily one tower at a time
+    and refined by simulated annealing. Scores are memoized per layout and
+    the search is deterministic for a given `seed`.
+    """
+
+    def __init__(self, game, iterations=200, samples=40, positions=None, temperature=None, seed=0):
+        self.game = game
+        self.iterations = iterations
+        self.samples = samples
+        self.random = random.Random(seed)
+
+        ranked = game.bestTowerPositions[::-1]
+        if game.towerCost > 0:
+            self.budget = min(game.money // game.towerCost, len(ranked))
+        else:
+            self.budget = len(ranked)
+        self.positions = ranked[:positions or max(10, 3 * self.budget)]
+
+        # one shot per frame a bug spends in range of the best covering cell
+        shots = max(game.coverage.counts[position] for position in self.positions) if self.positions else None
+        bugs = sorted(game.bugs.itervalues(), key=lambda bug: (bug.frame, bug.name))
+        self.palette = colorPalette([(bug.name, bug.colors) for bug in bugs], shots)
+
+        # accepting a move that costs one life is likely at the start, rare at the end
+        self.temperature = temperature if temperature is not None else 1.0
+        self.scores = {}
+
+    def towers(self, layout):
+        return [Tower('tower_%s' % i, 0, x, y, dict(self.palette[color]))
+                for i, ((x, y), color) in enumerate(sorted(layout))]
+
+    def score(self, layout):
+        key = tuple(sorted(layout))
+        if key not in self.scores:
+            life, money, _ = self.game.simulate(FixedStrategy(self.towers(key)))
+            self.scores[key] = (life, money)
+        return self.scores[key]
+
+    def candidates(self, layout):
+        used = set(position for position, _ in layout)
+        pairs = [(position, color) for position in self.positions if position not in used
+                 for color in xrange(len(self.palette))]
+        if len(pairs) > self.samples:
+            pairs = self.random.sample(pairs, self.samples)
+        return pairs
+
+    def seed(self):
+        """Add the best sampled tower while it improves the score."""
+        layout = []
+        best = self.score(layout)
+        while len(layout) < self.budget:
+            scored = [(self.score(layout + [pair]), pair) for pair in self.candidates(layout)]
+            if not scored:
+                break
+            score, pair = max(scored)
+            if score <= best:
+                break
+            layout.append(pair)
+            best = score
+
+        return layout, best
+
+    def neighbour(self, layout):
+        layout = list(layout)
+        used = set(position for position, _ in layout)
+        free = [position for position in self.positions if position not in used]
+        moves = ['color']
+        if free:
+            moves.append('move')
+            if len(layout) < self.budget:
+                moves.append('add')
+        if len(layout) > 1:
+            moves.append('remove')
+
+        if not layout:
+            moves = ['add'] if free else []
+        if not moves:
+            return layout
+
+        move = self.random.choice(moves)
+        if move == 'add':
+            layout.append((self.random.choice(free), self.random.randrange(len(self.palette))))
+        elif move == 'remove':
+            layout.pop(self.random.randrange(len(layout)))
+        else:
+            i = self.random.randrange(len(layout))
+            position, color = layout[i]
+            if move == 'move':
+                position = self.random.choice(free)
+            else:
+                color = self.random.randrange(len(self.palette))
+            layout[i] = (position, color)
+
+        return layout
+
+    def anneal(self, layout, score):
+        best, bestScore = layout, score
+        for step in xrange(self.iterations):
+            temperature = self.temperature * (1 - float(step) / self.iterations)
+            candidate = self.neighbour(layout)
+            candidateScore = self.score(candidate)
+
+            delta = candidateScore[0] - score[0]
+            if candidateScore >= score or (temperature > 0 and self.random.random() < math.exp(delta / temperature)):
+                layout, score = candidate, candidateScore
+                if score > bestScore:
+                    best, bestScore = layout, score
+
+        return best, bestScore
+
+    def optimize(self):
+        """The towers of the best layout found."""
+        if not self.palette or not self.positions or self.budget <= 0:
+            return []
+
+        layout, score = self.seed()
+        layout, score = self.anneal(layout, score)
+        return self.towers(layout)
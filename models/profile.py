@@ -0,0 +1,100 @@
+import json
+import time
+
+
+def _bucket(value):
+    # histogram buckets are powers of two: 0, 1, 2, 4, 8...
+    bucket = 1
+    if value <= 0:
+        return 0
+    while bucket < value:
+        bucket <<= 1
+    return bucket
+
+
+class Profiler(object):
+    """Opt-in per-phase timers, counters and per-frame histograms.
+
+    Phases nest: `start('target')` inside `start('frame')` is recorded under
+    the folded path `frame;target`, with its own time kept apart from its
+    children's so the paths add up to the wall time. Counters add up over
+    the run and, through `endFrame`, into histograms of their value per
+    frame, next to the frame time in microseconds.
+
+    Disabled by default; hot paths check `enabled` first, so a disabled
+    profiler costs one attribute lookup and never reads the clock.
+    """
+
+    def __init__(self, enabled=False, clock=time.time):
+        self.enabled = enabled
+        self.clock = clock
+        self.stack = []
+        self.selfTimes = {}
+        self.calls = {}
+        self.counters = {}
+        self.frameCounters = {}
+        self.histograms = {}
+        self.frames = 0
+
+    def start(self, phase):
+        path = '%s;%s' % (self.stack[-1][0], phase) if self.stack else phase
+        # [path, started, time spent in children]
+        self.stack.append([path, self.clock(), 0.0])
+
+    def stop(self):
+        path, started, children = self.stack.pop()
+        elapsed = self.clock() - started
+        self.selfTimes[path] = self.selfTimes.get(path, 0.0) + elapsed - children
+        self.calls[path] = self.calls.get(path, 0) + 1
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        return elapsed
+
+    def unwind(self, depth):
+        """Stop every phase started above `depth`, those an exception left
+        open included."""
+        while len(self.stack) > depth:
+            self.stop()
+
+    def count(self, name, value=1):
+        self.frameCounters[name] = self.frameCounters.get(name, 0) + value
+
+    def observe(self, name, value):
+        histogram = self.histograms.setdefault(name, {})
+        bucket = _bucket(value)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def endFrame(self, seconds):
+        """Fold the counters of a frame that took `seconds` into the totals
+        and histograms."""
+        self.frames += 1
+        self.observe('frame us', int(seconds * 1000000))
+        for name, value in self.frameCounters.iteritems():
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.observe(name, value)
+        self.frameCounters = {}
+
+    def toDict(self):
+        return {
+            'frames': self.frames,
+            'phases': dict((path, {'seconds': self.selfTimes[path], 'calls': self.calls[path]}) for path in self.selfTimes),
+            'counters': self.counters,
+            'histograms': dict((name, sorted(histogram.iteritems())) for name, histogram in self.histograms.iteritems()),
+        }
+
+    def dumpJson(self, stream):
+        json.dump(self.toDict(), stream, indent=2, sort_keys=True)
+
+    def dumpFolded(self, stream):
+        """One `path;to;phase microseconds` line per phase, the input of
+        flamegraph.pl and speedscope."""
+        for path in sorted(self.selfTimes):
+            stream.write('%s %d\n' % (path, int(self.selfTimes[path] * 1000000)))
+
+    def dump(self, path):
+        """Write to `path`, folded stacks for a `.folded` file, JSON otherwise."""
+        with open(path, 'w') as f:
+            if path.endswith('.folded'):
+                self.dumpFolded(f)
+            else:
+                self.dumpJson(f)
@@ -0,0 +1,194 @@
+from array import array
+
+from models.game import Tower, Shoot, GameException
+from models.level import readLevel
+from models.sources import openLines
+
+
+def readActions(source):
+    """Stream the actions of a solution, one Tower or Shoot at a time.
+
+    `source` is a path, a file-like object or lines, see `openLines`.
+    """
+    with openLines(source) as lines:
+        for action in _readActions(lines):
+            yield action
+
+
+def _readActions(lines):
+    fields = {}
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            key, sep, value = line.partition('=')
+            if not sep:
+                raise GameException('Line %s: expected key=value, got %s' % (number, line))
+            fields[key] = value
+            continue
+
+        if fields:
+            yield _action(fields, number)
+            fields = {}
+
+    if fields:
+        yield _action(fields, 'end')
+
+
+def _action(fields, number):
+    try:
+        kind = fields['action']
+        frame = int(fields['frame'])
+        if kind == 'new_tower':
+            tower = Tower(name=fields['name'], frame=frame)
+            y, x = fields['position'].split(',')
+            tower.x, tower.y = int(x), int(y)
+            for color in fields['colors'].split(','):
+                if color:
+                    name, value = color.split(':')
+                    tower.colors[name] = int(value)
+            return tower
+        elif kind == 'shoot':
+            return Shoot(frame, fields['tower_name'], fields['bug_name'])
+    except KeyError as e:
+        raise GameException('Line %s: action is missing %s' % (number, e.args[0]))
+    except ValueError:
+        raise GameException('Line %s: malformed action %s' % (number, fields))
+
+    raise GameException('Line %s: unknown action %s' % (number, kind))
+
+
+class Replay(object):
+    """Validates a solution against a level in one pass over its actions.
+
+    A bug spawned at frame `s` stands on `road.cells[f - s]` at frame `f` and
+    leaves the map at frame `s + len(road)`, so positions are looked up
+    instead of simulated and leaks are applied from a list sorted by frame.
+    Within a frame bugs move first and actions follow in file order, exactly
+    like `GameHandler.nextGameState`.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.road = level.road
+        self.colorIndex = dict((color, i) for i, color in enumerate(level.colors))
+        self.bugIndex = dict((name, i) for i, name in enumerate(level.names))
+
+    def _damage(self, tower):
+        vector = [0] * len(self.level.colors)
+        extra = 0
+        for color, value in tower.colors.iteritems():
+            try:
+                vector[self.colorIndex[color]] = value
+            except KeyError:
+                extra += value
+
+        return vector, extra
+
+    def run(self, actions):
+        """Play `actions`, return the final (life, money) or raise GameException."""
+        level = self.level
+        cells = self.road.cells
+        width = len(level.colors)
+        towerRange = level.towerRange
+
+        health = level.health[:]
+        lives = array('l', (sum(health[i * width : (i + 1) * width]) for i in xrange(len(level.names))))
+        gone = bytearray(len(level.names))
+        leaks = sorted((frame + len(cells), i) for i, frame in enumerate(level.frames))
+        nextLeak = 0
+
+        towers = {}
+        life, money = level.life, level.money
+        lastFrame = 0
+
+        for action in actions:
+            frame = action.frame
+            if frame < lastFrame:
+                raise GameException('Frames are not in order. Current frame is %s and last is %s' % (frame, lastFrame))
+            lastFrame = frame
+
+            # bugs that got to X up to this frame
+            while nextLeak < len(leaks) and leaks[nextLeak][0] <= frame:
+                leakFrame, i = leaks[nextLeak]
+                nextLeak += 1
+                gone[i] = 1
+                if lives[i] > 0:
+                    life -= lives[i]
+                    if life <= 0:
+                        raise GameException('Game Over. Bug #%s got to X at frame %s' % (level.names[i], leakFrame))
+
+            if isinstance(action, Tower):
+                if action.name in towers:
+                    raise GameException('Tower #%s already exists' % action.name)
+                if not (0 <= action.x < len(level.table) and 0 <= action.y < len(level.table[action.x])) or level.table[action.x][action.y] != '0':
+                    raise GameException('Tower #%s position is not valid' % action.name)
+                if len(action.colors) > 5:
+                    raise GameException('Tower #%s fires more than 5 colors' % action.name)
+                if len(action.name) > 16:
+                    raise GameException('Tower name has more than 16 chars')
+                for color, value in action.colors.iteritems():
+                    if value > 100000:
+                        raise GameException('Tower #%s has big damage: #%s = %s' % (action.name, color, value))
+                    if value < 0:
+                        raise GameException('Tower #%s has negative damage: #%s = %s' % (action.name, color, value))
+
+                # pay for tower
+                money -= level.towerCost
+                if money < 0:
+                    raise GameException('Not enough money for tower #%s' % action.name)
+
+                towers[action.name] = (action.x, action.y) + self._damage(action)
+                continue
+
+            if action.towerName not in towers:
+                raise GameException('Tower #%s does not exist' % action.towerName)
+            if action.bugName not in self.bugIndex:
+                raise GameException('Bug #%s does not exist.' % action.bugName)
+
+            x, y, vector, colateral = towers[action.towerName]
+            i = self.bugIndex[action.bugName]
+            step = frame - level.frames[i]
+            if step < 0:
+                raise GameException('Bug #%s is not on the map at frame %s' % (action.bugName, frame))
+            if gone[i]:
+                raise GameException('Bug #%s already got to X' % action.bugName)
+
+            bugX, bugY = cells[step]
+            if max(abs(bugX - x), abs(bugY - y)) > towerRange:
+                raise GameException('Bug #%s is too far from tower #%s' % (action.bugName, action.towerName))
+
+            # shoot bug
+            base = i * width
+            alive = lives[i] > 0
+            for color, value in enumerate(vector):
+                if value:
+                    old = health[base + color]
+                    if value > old:
+                        colateral += value - old
+                        value = old
+                    health[base + color] = old - value
+                    lives[i] -= value
+
+            if alive and lives[i] == 0:
+                money += level.reward
+            if colateral > 0:
+                life -= colateral
+                if life <= 0:
+                    raise GameException('Game Over. Tower #%s hit bug #%s too hard at frame %s' % (action.towerName, action.bugName, frame))
+
+        # every bug still alive gets to X eventually
+        for leakFrame, i in leaks[nextLeak:]:
+            life -= lives[i]
+            if life <= 0:
+                raise GameException('Game Over. Bug #%s got to X at frame %s' % (level.names[i], leakFrame))
+
+        return life, money
+
+
+def validate(level, solution):
+    """Replay `solution` (a path or file-like object) on `level` (a Level,
+    or a level path or file-like object) and return the final (life, money)."""
+    if not hasattr(level, 'road'):
+        level = readLevel(level)
+
+    return Replay(level).run(readActions(solution))
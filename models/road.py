@@ -0,0 +1,121 @@
+from models.game import GameException
+
+
+class Road(object):
+    """Immutable, index-backed road shared by every bug on a map.
+
+    `cells[i]` is the cell a bug stands on after `i + 1` moves: `cells[0]` is
+    the entrance `E` and `cells[-1]` is the exit `X`, so a bug has
+    `len(road) - steps` moves left (see `Bug.stepsLeft`).
+    """
+
+    __slots__ = ('cells', 'index', '_reach')
+
+    def __init__(self, cells):
+        cells = tuple(cells)
+        object.__setattr__(self, 'cells', cells)
+        object.__setattr__(self, 'index', dict((cell, step) for step, cell in enumerate(cells)))
+        object.__setattr__(self, '_reach', {})
+
+    @classmethod
+    def trace(cls, table, entrance):
+        """Follow the `1` cells of `table` from `entrance` to the `X` cell.
+
+        Iterative and linear in the road length. Raises GameException when the
+        road forks, loops back onto itself or stops before reaching `X`.
+        """
+        if entrance is None:
+            raise GameException('Road has no entrance E')
+
+        dx = [-1, 1, 0, 0]
+        dy = [0, 0, 1, -1]
+
+        cells = [entrance]
+        visited = set(cells)
+        x, y = entrance
+        while table[x][y] != 'X':
+            following = []
+            touching = False
+            for i, j in zip(dx, dy):
+                i, j = x + i, y + j
+                if not (0 <= i < len(table) and 0 <= j < len(table[i])):
+                    continue
+                if table[i][j] not in '1X':
+                    continue
+                if (i, j) in visited:
+                    touching = touching or (i, j) != cells[-2 if len(cells) > 1 else -1]
+                else:
+                    following.append((i, j))
+
+            if len(following) > 1:
+                raise GameException('Road branches at %s,%s into %s' % (y, x, ' and '.join('%s,%s' % (j, i) for i, j in following)))
+            if not following:
+                if touching:
+                    raise GameException('Road loops back onto itself at %s,%s' % (y, x))
+                raise GameException('Road has a dead end at %s,%s' % (y, x))
+
+            x, y = following[0]
+            cells.append((x, y))
+            visited.add((x, y))
+
+        return cls(cells)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Road is immutable')
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, position):
+        return position in self.index
+
+    def __getitem__(self, position):
+        # dict-compatible lookup of the next cell, KeyError once at the exit
+        if position == (None, None):
+            return self.cells[0]
+
+        step = self.index[position] + 1
+        if step == len(self.cells):
+            raise KeyError(position)
+        return self.cells[step]
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return 'Road(%s)' % (list(self.cells), )
+
+    def reach(self, x, y, towerRange):
+        """Sorted step counts of the road cells a tower at (x, y) can hit.
+
+        A bug that has moved `steps` times is in range iff `steps` is listed.
+        Results are cached per position, towers never move.
+        """
+        key = (x, y, towerRange)
+        try:
+            return self._reach[key]
+        except KeyError:
+            pass
+
+        steps = []
+        for i in xrange(x - towerRange, x + towerRange + 1):
+            for j in xrange(y - towerRange, y + towerRange + 1):
+                step = self.index.get((i, j))
+                if step is not None:
+                    steps.append(step + 1)
+        steps.sort()
+
+        self._reach[key] = steps
+        return steps
+
+    def cell(self, steps):
+        """Cell of a bug that has moved `steps` times, None before it enters."""
+        if steps <= 0:
+            return None, None
+        return self.cells[steps - 1]
@@ -0,0 +1,117 @@
+from models.game import Tower, Shoot, GameException
+
+
+class BeamSearch(object):
+    """Beam search over the shots of every frame.
+
+    `GameHandler.planShots` commits to one greedy target per tower. Here
+    each kept line of play branches into the greedy plan plus the plans
+    where a single tower holds fire or shoots one of its other
+    `branching` best zero collateral targets from `GameHandler.shotOptions`.
+    Children are played with `nextGameState`, lines that lose all life are
+    cut, and the `width` best by (life, money, -life of the bugs left) go on
+    to the next frame.
+
+    Bug positions only depend on the frame, so two lines are in the same
+    state when health, towers, life and money match. Each frame keeps a
+    transposition table of those keys and a state reached by another shot
+    order is not expanded again; `hits` counts them.
+
+    Towers come from `strategy.placeTowers` and `strategy.build`, targeting
+    is the search's own.
+    """
+
+    def __init__(self, game, strategy, width=8, branching=2):
+        self.game = game
+        self.strategy = strategy
+        self.width = width
+        self.branching = branching
+        self.table = {}
+        self.hits = 0
+
+    def key(self, frame, life, money):
+        game = self.game
+        return (frame, life, money, tuple(sorted(game.towers)), game.health.values.tostring())
+
+    def score(self, life, money):
+        remaining = sum(bug.life for _, bug in self.game.bugs.iteritems())
+        return life, money, -remaining
+
+    def branches(self, frame, life, money):
+        """Shoot lists worth trying at `frame` from the current state."""
+        game = self.game
+        greedy = game.planShots(frame, life, money)
+        options = game.shotOptions(frame, self.branching)
+        yield greedy
+
+        targets = dict((shoot.towerName, shoot.bugName) for shoot in greedy)
+        for towerName in sorted(options):
+            rest = [shoot for shoot in greedy if shoot.towerName != towerName]
+            if towerName in targets:
+                yield rest
+            for bugName in options[towerName]:
+                if bugName != targets.get(towerName):
+                    yield rest + [Shoot(frame, towerName, bugName)]
+
+    def run(self):
+        """Search the whole level, return (life, money, frames, actions)."""
+        game = self.game
+        actions = self.strategy.placeTowers(game)
+        for tower in actions:
+            game.towers[tower.name] = tower
+
+        lastFrame = 0
+        for _, bug in game.bugs.iteritems():
+            if lastFrame < bug.frame:
+                lastFrame = bug.frame
+
+        # (score, life, money, state, (actions, parent))
+        beam = [(None, game.life, game.money, game.snapshot(), None)]
+        frame = 0
+        for frame in xrange(len(game.road) + lastFrame + 1):
+            self.table = {}
+            children = []
+            pending = actions if frame == 0 else []
+
+            for _, life, money, state, node in beam:
+                game.restore(state)
+                for shoots in list(self.branches(frame, life, money)):
+                    game.restore(state)
+                    frameActions = self.strategy.build(game, frame, list(pending) + shoots)
+                    # towers may fire a bug's live health, record it as written at build time
+                    recorded = []
+                    for action in frameActions:
+                        if isinstance(action, Tower):
+                            game.towers[action.name] = action
+                            action = Tower(action.name, action.frame, action.x, action.y, dict(action.colors))
+                        recorded.append(action)
+
+                    childLife, childMoney = game.nextGameState(frameActions, life, money, frame)
+                    if childLife <= 0:
+                        continue
+
+                    key = self.key(frame, childLife, childMoney)
+                    if key in self.table:
+                        self.hits += 1
+                        continue
+                    self.table[key] = True
+
+                    children.append((self.score(childLife, childMoney), childLife, childMoney,
+                                     game.snapshot(childLife, childMoney), (recorded, node)))
+
+            if not children:
+                raise GameException('Game Over. no line of play survives frame {0}'.format(frame))
+
+            children.sort(key=lambda child: child[0], reverse=True)
+            beam = children[:self.width]
+
+        _, life, money, state, node = beam[0]
+        game.restore(state)
+
+        frames = []
+        while node is not None:
+            frameActions, node = node
+            frames.append(frameActions)
+        best = [action for frameActions in reversed(frames) for action in frameActions]
+
+        return life, money, frame + 1, best
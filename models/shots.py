@@ -0,0 +1,55 @@
+import numpy as np
+
+NEVER = -1
+# clean shots of a tower that fires nothing, it never deals collateral
+ALWAYS = np.iinfo(np.int64).max
+
+
+def shotMatrix(health, towers, rows):
+    """Closed-form outcome of every tower shooting every bug until it dies.
+
+    `towers` are colors mappings (a Tower's `colors`), `rows` the
+    `HealthMatrix` rows of the bugs, at their current health. A shot takes
+    `d` off every color and clips at zero, so with `h` left a bug dies
+    after `max(ceil(h / d))` shots over the colors the tower fires, or never
+    if it has health in a color the tower does not fire. Every shot deals
+    `sum(d)` plus the damage in colors no bug has, of which only `h` is
+    absorbed, and the first `min(h // d)` shots fit entirely.
+
+    Returns three towers x bugs int64 matrices: `shots` to kill (`NEVER`
+    when it cannot), total `collateral` of those shots (`NEVER` too) and
+    `clean`, the shots fired before the first collateral (`ALWAYS` for a
+    tower with an empty damage vector).
+    """
+    width = len(health.colors)
+    damage = np.zeros((len(towers), width), dtype=np.int64)
+    extra = np.zeros(len(towers), dtype=np.int64)
+    for i, colors in enumerate(towers):
+        vector, extra[i] = health.damage(colors)
+        damage[i] = vector
+
+    if width and len(rows):
+        values = np.array(health.values, dtype=np.int64).reshape(-1, width)
+        bugs = values[np.asarray(rows, dtype=np.int64)]
+    else:
+        bugs = np.zeros((len(rows), width), dtype=np.int64)
+
+    # towers x bugs x colors
+    d = damage[:, None, :]
+    h = bugs[None, :, :]
+    fired = d > 0
+    safe = np.where(fired, d, 1)
+
+    unreachable = ((~fired) & (h > 0)).any(axis=2)
+    shots = np.where(fired, -(-h // safe), 0).max(axis=2, initial=0)
+    shots[unreachable] = NEVER
+
+    absorbed = np.where(fired, h, 0).sum(axis=2)
+    perShot = damage.sum(axis=1) + extra
+    collateral = shots * perShot[:, None] - absorbed
+    collateral[unreachable] = NEVER
+
+    clean = np.where(fired, h // safe, ALWAYS).min(axis=2, initial=ALWAYS)
+    clean[np.broadcast_to((extra > 0)[:, None], clean.shape)] = 0
+
+    return shots, collateral, clean
@@ -0,0 +1,77 @@
+import gzip
+import mmap
+import os
+from contextlib import contextmanager
+
+from models.game import GameException
+
+COMPRESSIONS = ('gzip', 'xz')
+
+
+def _lzma():
+    try:
+        import lzma
+    except ImportError:
+        try:
+            from backports import lzma
+        except ImportError:
+            raise GameException('xz files need the lzma module (backports.lzma on Python 2)')
+    return lzma
+
+
+def compression(path):
+    """'gzip' or 'xz' for a compressed file name, None otherwise."""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.xz'):
+        return 'xz'
+    return None
+
+
+def compressedFile(raw, kind, mode):
+    """Wrap the open binary file `raw` to read or write `kind` data."""
+    if kind == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode=mode)
+    if kind == 'xz':
+        return _lzma().LZMAFile(raw, mode)
+    raise GameException('Unknown compression %s' % kind)
+
+
+@contextmanager
+def openLines(source):
+    """The lines of a level or solution, streamed.
+
+    `source` is a path, anything with a `readline` method (a file, an
+    `mmap`, a `GzipFile`...) or an iterable of lines. Paths ending in `.gz`
+    or `.xz` are decompressed on the fly and other files are memory mapped,
+    so no source is ever read into one string up front. Sources opened
+    here are closed on exit, the others are left to their owner.
+    """
+    if not isinstance(source, basestring):
+        if hasattr(source, 'readline'):
+            yield iter(source.readline, '')
+        else:
+            yield source
+        return
+
+    kind = compression(source)
+    if kind is not None:
+        with open(source, 'rb') as raw:
+            f = compressedFile(raw, kind, 'rb')
+            try:
+                yield iter(f.readline, '')
+            finally:
+                f.close()
+        return
+
+    with open(source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # empty files cannot be mapped
+            yield iter([])
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield iter(mapped.readline, '')
+        finally:
+            mapped.close()
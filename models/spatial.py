@@ -0,0 +1,28 @@
+class BugIndex(object):
+    """Bugs on the road bucketed by step count, built once per frame.
+
+    Combined with `Road.reach`, a tower only visits the bugs standing on cells
+    it can hit instead of every bug of the game.
+    """
+
+    def __init__(self, bugs):
+        self.buckets = {}
+
+        # rank keeps the iteration order of `bugs`, targeting ties depend on it
+        for rank, (_, bug) in enumerate(bugs.iteritems()):
+            if bug.steps > 0 and bug.life > 0:
+                try:
+                    self.buckets[bug.steps].append((rank, bug))
+                except KeyError:
+                    self.buckets[bug.steps] = [(rank, bug)]
+
+    def near(self, steps):
+        """Bugs standing on any of the `steps`, in iteration order."""
+        found = []
+        for step in steps:
+            bugs = self.buckets.get(step)
+            if bugs:
+                found.extend(bugs)
+        found.sort(key=lambda item: item[0])
+
+        return [bug for _, bug in found]
@@ -0,0 +1,33 @@
+class GameState(object):
+    """Restorable snapshot of everything a game mutates while it is played.
+
+    The road is immutable and towers never change once built, so both are kept
+    by reference. Bugs keep their identity: a snapshot only copies the flat
+    step table and health matrix, and `restore` writes them back in place.
+    """
+
+    __slots__ = ('life', 'money', 'towers', 'bugs', 'stepTable', 'steps', 'health', 'values')
+
+    def __init__(self, life, money, towers, bugs, health, stepTable):
+        self.life = life
+        self.money = money
+        self.towers = dict(towers)
+        self.bugs = dict(bugs)
+        self.stepTable = stepTable
+        self.steps = stepTable.snapshot()
+        self.health = health
+        self.values = health.snapshot()
+
+    def restore(self, towers, bugs):
+        """Roll `towers` and `bugs` back to the snapshot, return (life, money)."""
+        if towers != self.towers:
+            towers.clear()
+            towers.update(self.towers)
+        if bugs != self.bugs:
+            bugs.clear()
+            bugs.update(self.bugs)
+
+        self.stepTable.restore(self.steps)
+        self.health.restore(self.values)
+
+        return self.life, self.money
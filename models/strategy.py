@@ -0,0 +1,98 @@
+import json
+import os
+
+from models.game import Tower, Shoot
+from models.sources import compression
+
+STRATEGY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'strategies')
+
+
+class Strategy(object):
+    """How a level is played. `GameHandler.findSolution` runs the frames and
+    calls these hooks, so the per-level logic never touches the engine.
+
+    The default builds nothing and shoots whatever `GameHandler.planShots`
+    picks for the towers already standing.
+    """
+
+    def placeTowers(self, game):
+        """Towers built before the first frame."""
+        return []
+
+    def target(self, game, frame, life, money):
+        """Shoot actions of a frame."""
+        return game.planShots(frame, life, money)
+
+    def build(self, game, frame, actions):
+        """Final actions of a frame, mid-game towers included."""
+        return actions
+
+    def buildFrames(self, game):
+        """Frames where `build` may change the actions, visited even when
+        no tower has anything in range."""
+        return []
+
+
+class ScriptedStrategy(Strategy):
+    """A hand written solution given as data.
+
+    `towers` lists the towers built at frame 0. `frames` maps a frame to the
+    towers built and shots fired there; with `replace` they stand in for the
+    shots planned that frame instead of adding to them. A tower's `colors`
+    may name a bug, the tower then fires that bug's live health.
+    """
+
+    def __init__(self, data):
+        self.towers = data.get('towers', [])
+        self.frames = dict((int(frame), entry) for frame, entry in data.get('frames', {}).iteritems())
+
+    def _tower(self, game, spec, frame):
+        colors = spec['colors']
+        if isinstance(colors, basestring):
+            colors = game.bugs[colors].colors
+
+        return Tower(spec['name'], frame, spec['x'], spec['y'], colors)
+
+    def placeTowers(self, game):
+        return [self._tower(game, spec, 0) for spec in self.towers]
+
+    def buildFrames(self, game):
+        return list(self.frames)
+
+    def build(self, game, frame, actions):
+        entry = self.frames.get(frame)
+        if entry is None:
+            return actions
+
+        if entry.get('replace', False):
+            actions = []
+        for spec in entry.get('towers', []):
+            actions.append(self._tower(game, spec, frame))
+        for towerName, bugName in entry.get('shoots', []):
+            actions.append(Shoot(frame, towerName, bugName))
+
+        return actions
+
+
+def loadStrategy(inputFile, directory=STRATEGY_DIR):
+    """The strategy of a level: `<directory>/<level name>.json` if there is
+    one, an automatic tower placement search otherwise.
+
+    The level name drops a `.gz` or `.xz` suffix along with the extension.
+    A level read from a file-like object has no name to look up.
+    """
+    from models.placement import PlacementStrategy
+
+    if not isinstance(inputFile, basestring):
+        return PlacementStrategy()
+
+    name = os.path.basename(inputFile)
+    if compression(name) is not None:
+        name = os.path.splitext(name)[0]
+    name = os.path.splitext(name)[0]
+    path = os.path.join(directory, '%s.json' % name)
+    if not os.path.isfile(path):
+        return PlacementStrategy()
+
+    with open(path, 'r') as f:
+        return ScriptedStrategy(json.load(f))
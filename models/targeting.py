@@ -0,0 +1,94 @@
+from bisect import insort
+
+from models.health import HealthRow
+
+
+class TargetQueues(object):
+    """Per-tower candidate targets, carried from one frame to the next.
+
+    `GameHandler.bestTarget` keeps the last bug in `bugs` iteration order
+    that takes damage without collateral, so a tower's candidates are kept
+    sorted by that rank, best first. Bugs join a tower's candidates when
+    their exposure interval from `game.timeline` starts and leave once it
+    ends, they die or get to X. Whether a shot is collateral free is cached
+    per tower and bug under the `HealthMatrix` versions of both, so it is
+    only computed again after one of them was hit. Health only goes down,
+    so a bug a fixed color tower cannot hit cleanly never can again and is
+    dropped for good; towers firing a bug's live health keep theirs.
+
+    Candidates are only dropped on committed health. Bugs hit by the
+    `planShots` lookahead are listed in `shot` until the next plan: the
+    planned shots may never be fired (a strategy can replace them), so a
+    bug the lookahead killed or dirtied is skipped, not dropped.
+
+    Valid while frames only move forward with the same `bugs` dict, which
+    is why `GameHandler.restore` drops the queues.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.rank = dict((name, rank) for rank, name in enumerate(game.bugs))
+        self.queues = {}
+        self.clean = {}
+        self.shot = set()
+
+    def _queue(self, tower):
+        try:
+            return self.queues[tower.name]
+        except KeyError:
+            # [intervals, next interval to admit, candidates by descending rank]
+            queue = self.queues[tower.name] = [self.game.timeline.intervals(tower.x, tower.y), 0, []]
+            return queue
+
+    def _version(self, colors):
+        if isinstance(colors, HealthRow):
+            return colors.health.versions[colors.row]
+        return None
+
+    def _isClean(self, tower, bug, towerVersion):
+        key = (tower.name, bug.name)
+        version = (bug.health.versions[bug.row], towerVersion)
+        cached = self.clean.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if self.game.profiler.enabled:
+            self.game.profiler.count('previews')
+        colateral, lifeAfterShot = self.game.shootBug(tower, bug, False)
+        clean = colateral == 0 and lifeAfterShot < bug.life
+        self.clean[key] = (version, clean)
+        return clean
+
+    def best(self, tower, frame):
+        """The bug `bestTarget` would pick for `tower` at `frame`, or None."""
+        queue = self._queue(tower)
+        intervals, admitted, candidates = queue
+
+        while admitted < len(intervals) and intervals[admitted][1] <= frame:
+            name, _, last = intervals[admitted]
+            admitted += 1
+            if last >= frame and name in self.rank:
+                insort(candidates, (-self.rank[name], name, last))
+        queue[1] = admitted
+
+        towerVersion = self._version(tower.colors)
+        bugs = self.game.bugs
+        profiler = self.game.profiler
+        i = 0
+        while i < len(candidates):
+            if profiler.enabled:
+                profiler.count('candidates')
+            _, name, last = candidates[i]
+            bug = bugs.get(name)
+            if last < frame or bug is None:
+                del candidates[i]
+                continue
+
+            if bug.isAlive and self._isClean(tower, bug, towerVersion):
+                return bug
+            if (not bug.isAlive or towerVersion is None) and name not in self.shot:
+                del candidates[i]
+                continue
+            i += 1
+
+        return None
@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right
+
+
+class ExposureTimeline(object):
+    """When every bug is in range of a tower on every buildable cell.
+
+    Bugs walk the fixed road from their spawn frame, a bug spawned at `s`
+    standing `k` steps in (`bug.steps == k`) at frame `s + k - 1`. The road
+    cells a position covers are known from `Coverage`, so the frames a bug
+    can be shot from there are too: `windows[(x, y)]` are the covered steps
+    merged into `(first step, last step)` runs, shifted per bug by its spawn
+    frame into `(bug, first frame, last frame)` intervals. Intervals only
+    depend on the level, a bug killed early keeps its later ones.
+
+    A bug is `k` steps in at frame `f` when it spawned at `f - k + 1`, so
+    the bugs in a run at a frame are the ones spawned in a range of frames:
+    `exposed` bisects the spawn frames once per run.
+    """
+
+    def __init__(self, coverage, names, frames):
+        self.coverage = coverage
+        self.spawns = zip(names, frames)
+        self.windows = {}
+        self._intervals = {}
+        # names and spawn frames, sorted by spawn frame
+        self._byFrame = sorted(self.spawns, key=lambda spawn: spawn[1])
+        self._spawnFrames = [frame for _, frame in self._byFrame]
+
+        for position, steps in coverage.steps.iteritems():
+            self.windows[position] = self._runs(steps)
+
+    @staticmethod
+    def _runs(steps):
+        runs = []
+        for step in steps:
+            if runs and runs[-1][1] == step - 1:
+                runs[-1][1] = step
+            else:
+                runs.append([step, step])
+        return [tuple(run) for run in runs]
+
+    def intervals(self, x, y):
+        """`(bug, first frame, last frame)` in range of (x, y), sorted by
+        first frame, computed on first use and kept."""
+        try:
+            return self._intervals[(x, y)]
+        except KeyError:
+            pass
+
+        windows = self._windows(x, y)
+        intervals = sorted(
+            ((name, frame + first - 1, frame + last - 1) for name, frame in self.spawns for first, last in windows),
+            key=lambda interval: (interval[1], interval[2]))
+        self._intervals[(x, y)] = intervals
+
+        return intervals
+
+    def _windows(self, x, y):
+        windows = self.windows.get((x, y))
+        if windows is None:
+            windows = self.windows[(x, y)] = self._runs(self.coverage.reach(x, y))
+        return windows
+
+    def exposed(self, x, y, frame):
+        """Names of the bugs in range of (x, y) at `frame`, dead or alive."""
+        names = []
+        for first, last in self._windows(x, y):
+            start = bisect_left(self._spawnFrames, frame - last + 1)
+            end = bisect_right(self._spawnFrames, frame - first + 1)
+            names.extend(name for name, _ in self._byFrame[start:end])
+        return names
@@ -0,0 +1,195 @@
+import numpy as np
+
+from models.events import DEBUG, INFO, WARNING
+from models.game import Shoot, GameException
+
+
+class VectorizedEngine(object):
+    """NumPy implementation of the per-frame simulation of a `GameHandler`.
+
+    Bug positions, spawn frames, step counters and per-color health live in
+    arrays indexed in the iteration order of `handler.bugs`, so moving every
+    bug of a frame or scanning them for a tower's best target is one batched
+    operation. Bug objects are only written back when something looks at
+    them: a bug's health row is updated on every shot (towers may be built
+    from it) and its position is synced before it is snapshotted.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+        self.colors = list(handler.colors)
+        self.colorIndex = dict((color, i) for i, color in enumerate(self.colors))
+
+        self.bugs = [bug for _, bug in handler.bugs.iteritems()]
+        self.names = [bug.name for bug in self.bugs]
+        self.index = dict((name, i) for i, name in enumerate(self.names))
+        self.frames = np.array([bug.frame for bug in self.bugs], dtype=np.int64)
+        self.slots = np.array([bug.slot for bug in self.bugs], dtype=np.int64)
+        self.rows = np.array([bug.row for bug in self.bugs], dtype=np.int64)
+
+        self.xs = np.array([cell[0] for cell in handler.road.cells], dtype=np.int64)
+        self.ys = np.array([cell[1] for cell in handler.road.cells], dtype=np.int64)
+
+        self.load()
+
+    def load(self):
+        """Rebuild the arrays from the bug objects of the handler."""
+        self.present = np.array([bug.name in self.handler.bugs for bug in self.bugs], dtype=bool)
+        self.steps = self._stepTable()[self.slots].astype(np.int64)
+
+        # copied straight out of the dense HealthMatrix, columns past ours
+        # were interned after this engine was built
+        matrix = self.handler.health
+        if matrix.width:
+            values = np.frombuffer(matrix.values, dtype=np.int_).reshape(-1, matrix.width)
+            self.health = values[self.rows, :len(self.colors)].astype(np.int64)
+        else:
+            self.health = np.zeros((len(self.bugs), 0), dtype=np.int64)
+        self.lives = self.health.sum(axis=1)
+
+    def _stepTable(self):
+        # a view, only valid until the table grows
+        return np.frombuffer(self.handler.stepTable.steps, dtype=np.int_)
+
+    def sync(self, i=None):
+        """Write positions back into the step table, for one bug or all."""
+        if i is None:
+            self._stepTable()[self.slots] = self.steps
+        else:
+            self._stepTable()[self.slots[i]] = self.steps[i]
+
+    def _towerVector(self, tower):
+        # damage per interned color plus damage in colors no bug has
+        vector = np.zeros(len(self.colors), dtype=np.int64)
+        extra = 0
+        for color, value in tower.colors.iteritems():
+            if color in self.colorIndex:
+                vector[self.colorIndex[color]] = value
+            else:
+                extra += value
+
+        return vector, extra
+
+    def shootBug(self, tower, i):
+        vector, extra = self._towerVector(tower)
+        before = self.health[i]
+        after = before - vector
+        colateral = int(-after[after < 0].sum()) + extra
+        after = after.clip(min=0)
+
+        self.health[i] = after
+        self.lives[i] = after.sum()
+
+        # keep the bug's health row in sync, towers may be built from it
+        colors = self.bugs[i].colors
+        for color in tower.colors.keys():
+            if color in self.colorIndex:
+                colors[color] = int(after[self.colorIndex[color]])
+
+        return colateral
+
+    def bestTarget(self, tower, frame):
+        vector, extra = self._towerVector(tower)
+        if extra > 0:
+            return None
+
+        steps = self.steps
+        position = (steps - 1).clip(min=0)
+        candidates = (self.present & (self.lives > 0) & (self.frames <= frame) &
+                      (steps > 0) & (steps < len(self.xs)) &
+                      (np.maximum(abs(self.xs[position] - tower.x), abs(self.ys[position] - tower.y)) <= self.handler.towerRange))
+
+        after = self.health - vector
+        colateral = -after.clip(max=0).sum(axis=1)
+        damage = self.lives - after.clip(min=0).sum(axis=1)
+        candidates &= (colateral == 0) & (damage > 0)
+
+        # GameHandler.bestTarget keeps the last candidate that saves life
+        targets = np.flatnonzero(candidates)
+        if len(targets) == 0:
+            return None
+        return targets[-1]
+
+    def planShots(self, frame, life, money):
+        steps = self.steps.copy()
+        health = self.health.copy()
+        lives = self.lives.copy()
+        colors = {}
+
+        self.steps[self.present & (self.frames <= frame) & (self.steps < len(self.xs))] += 1
+
+        shoots = []
+        for _, tower in self.handler.towers.iteritems():
+            i = self.bestTarget(tower, frame)
+            if i is not None:
+                if i not in colors:
+                    colors[i] = self.bugs[i].colors.copy()
+                self.shootBug(tower, i)
+                shoots.append(Shoot(frame, tower.name, self.names[i]))
+
+        self.steps, self.health, self.lives = steps, health, lives
+        for i, saved in colors.iteritems():
+            # drops the colors the lookahead added too
+            self.bugs[i].colors.clear()
+            self.bugs[i].colors.update(saved)
+
+        return shoots
+
+    def executeAction(self, action, life, money, frame):
+        if action.frame != frame or not isinstance(action, Shoot):
+            return self.handler.executeAction(action, life, money, frame)
+
+        # shoot bug
+        tower = self.handler.towers[action.towerName]
+        bug = self.handler.bugs[action.bugName]
+        i = self.index[action.bugName]
+        events = self.handler.events
+        x, y = self.xs[self.steps[i] - 1], self.ys[self.steps[i] - 1]
+
+        if max(abs(x - tower.x), abs(y - tower.y)) > self.handler.towerRange:
+            raise GameException('Bug #%s is too far from tower #%s' % (bug.name, tower.name))
+
+        colateral = self.shootBug(tower, i)
+
+        if colateral > 0:
+            life -= colateral
+            if events.enabled(INFO):
+                events.info('collateral', frame=frame, tower=tower.name, bug=bug.name, damage=colateral, life=life)
+
+        if self.lives[i] == 0:
+            money += self.handler.reward
+            if events.enabled(INFO):
+                events.info('kill', frame=frame, tower=tower.name, bug=bug.name, money=money)
+
+        if events.enabled(DEBUG):
+            events.debug('shot', frame=frame, tower=tower.name, bug=bug.name, position='%s,%s' % (y, x), health=int(self.lives[i]))
+
+        return life, money
+
+    def skipTo(self, frame):
+        """Move the live bugs to where `frame` leaves them, none gets to X."""
+        active = self.present & (self.lives > 0) & (self.frames <= frame)
+        self.steps[active] = (frame + 1 - self.frames)[active]
+
+    def nextGameState(self, actions, life, money, frame):
+        # move active bugs, the step count only depends on the frame
+        active = self.present & (self.lives > 0) & (self.frames <= frame)
+        steps = frame + 1 - self.frames
+        leaked = active & (steps > len(self.xs))
+        moved = active & ~leaked
+        self.steps[moved] = steps[moved]
+
+        for i in np.flatnonzero(leaked):
+            bug = self.bugs[i]
+            self.sync(i)
+            life -= int(self.lives[i])
+            if self.handler.events.enabled(WARNING):
+                self.handler.events.warning('leak', frame=frame, bug=bug.name, damage=bug.life, life=life)
+            self.present[i] = False
+            self.handler.bugs.pop(bug.name)
+
+        for action in actions:
+            life, money = self.executeAction(action, life, money, frame)
+
+        return life, money
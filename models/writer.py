@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+from models.game import Tower, Shoot
+from models.sources import compression, compressedFile
+
+
+def formatAction(action):
+    """One action in the solution file format, blank line included."""
+    if isinstance(action, Tower):
+        return 'action=new_tower\nframe=%s\nname=%s\nposition=%s,%s\ncolors=%s\n\n' % (
+            action.frame, action.name, action.y, action.x,
+            ','.join(['%s:%s' % (key, value) for key, value in action.colors.iteritems() if value > 0]))
+    elif isinstance(action, Shoot):
+        return 'action=shoot\nframe=%s\ntower_name=%s\nbug_name=%s\n\n' % (
+            action.frame, action.towerName, action.bugName)
+
+    return '\n'
+
+
+def _umask():
+    # the umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+class SolutionWriter(object):
+    """Buffered writer of a solution, open for a whole run.
+
+    `target` is a path or any object with a `write` method. A path is written
+    through a temporary file in the same directory that only replaces
+    `target` once the run finished, so an interrupted run never leaves a
+    half written solution behind. Used as a context manager, it commits on
+    success and drops what it can on an exception: a path is left as it
+    was, while chunks already flushed to a file-like target stay written.
+
+    `compress` is 'gzip' or 'xz'; for a path it defaults to what the name
+    ends in (`.gz`, `.xz`).
+    """
+
+    def __init__(self, target, bufferSize=1 << 16, compress=None):
+        self.target = target
+        self.bufferSize = bufferSize
+        self.pending = []
+        self.pendingSize = 0
+        self.tempName = None
+
+        if hasattr(target, 'write'):
+            self.raw = target
+        else:
+            directory, name = os.path.split(os.path.abspath(target))
+            fd, self.tempName = tempfile.mkstemp(prefix='.%s.' % name, suffix='.tmp', dir=directory)
+            # mkstemp files are private, give the solution the mode open() would
+            os.chmod(self.tempName, 0666 & ~_umask())
+            self.raw = os.fdopen(fd, 'wb')
+            if compress is None:
+                compress = compression(target)
+
+        # the compressor is closed on commit, the target it writes to is not
+        self.file = self.raw
+        if compress:
+            try:
+                self.file = compressedFile(self.raw, compress, 'wb')
+            except Exception:
+                self.abort()
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, actions):
+        for action in actions:
+            text = formatAction(action)
+            self.pending.append(text)
+            self.pendingSize += len(text)
+
+        if self.pendingSize >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(''.join(self.pending))
+            self.pending = []
+            self.pendingSize = 0
+
+    def close(self):
+        """Write what is left and move the solution into place."""
+        self.flush()
+        if self.file is not self.raw:
+            self.file.close()
+        if self.tempName is None:
+            if hasattr(self.raw, 'flush'):
+                self.raw.flush()
+            return
+
+        self.raw.close()
+        os.rename(self.tempName, self.target)
+        self.tempName = None
+
+    def abort(self):
+        """Drop the solution, leaving a `target` path as it was; what was
+        already flushed to a file-like target stays there."""
+        self.pending = []
+        self.pendingSize = 0
+        if self.tempName is not None:
+            self.raw.close()
+            os.remove(self.tempName)
+            self.tempName = None
@@ -1,21 +1,47 @@
 import sys
-import os
 import json
+import heapq
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
-from random import randrange
 
-from models.game import Bug, Tower, Shoot, GameException
+from models.game import Bug, StepTable, Tower, Shoot, GameException
+from models.coverage import Coverage
+from models.events import EventLog, DEBUG, INFO, WARNING, LEVELS
+from models.health import HealthMatrix, ShotCache
+from models.level import readLevel
+from models.profile import Profiler
+from models.replay import Replay, readActions
+from models.search import BeamSearch
+from models.spatial import BugIndex
+from models.state import GameState
+from models.strategy import loadStrategy
+from models.targeting import TargetQueues
+from models.timeline import ExposureTimeline
+from models.writer import SolutionWriter
+
+# kinds of frames queued by GameHandler.playEvents, in the order they are
+# visited when they fall on the same frame
+PLAY, LEAK, RANGE = 0, 1, 2
 
 
 class GameHandler(object):
-    def __init__(self, inputFile=None, outputFile=None):
+    def __init__(self, inputFile=None, outputFile=None, engine='object', events=None, cache=False, strategy=None, simulation='frames',
+                 profiler=None, shotCache=None, checkTargets=False):
         self.inputFile = inputFile
+        # per-level placement, targeting and builds, see models/strategy.py
+        self.strategy = strategy if strategy is not None else loadStrategy(inputFile)
+        # reuse a binary <inputFile>.cache of the parsed level and road
+        self.cache = cache
         self.outputFile = outputFile
-
-        try:
-            os.remove(self.outputFile)
-        except:
-            pass
+        self.writer = None
+        # 'events' only visits frames where something can happen, see playEvents
+        if simulation not in ('frames', 'events'):
+            raise GameException('Unknown simulation %s' % simulation)
+        self.simulation = simulation
+        # structured frame/shot/kill/leak events, silent unless given a level
+        self.events = events if events is not None else EventLog()
+        # per-phase timers, counters and frame histograms, off unless given one
+        self.profiler = profiler if profiler is not None else Profiler()
 
         self.life = 0
         self.money = 0
@@ -23,21 +49,46 @@ class GameHandler(object):
         self.towerCost = 0
         self.reward = 0
 
-        self.colors = []
+        # an optional ShotCache memoizes shot outcomes by damage and health
+        self.health = HealthMatrix(shots=shotCache)
+        self.colors = self.health.colors
+        # step counters of every bug, snapshotted in one copy like health
+        self.stepTable = StepTable()
         self.towers = {}
         self.bugs = {}
         self.table = []
         self.actions = []
-        self.road = {}
+        self.entrance = None
+        self.level = None
+        self.road = None
         self.bestTowerPositions = []
+        self.coverage = None
+        self.timeline = None
+        # candidate targets per tower, kept across frames by planShots; with
+        # checkTargets every pick is compared against bestTarget
+        self.targets = None
+        self.checkTargets = checkTargets
 
         self._readInputFile()
         self._buildRoad()
         self._getBestTowerPositions()
 
-        # add road to each bug
+        # share the immutable road with each bug
         for _, bug in self.bugs.iteritems():
-            bug.road = deepcopy(self.road)
+            bug.road = self.road
+
+        # bugs by spawn frame, ties in iteration order: the bugs on the road
+        # at a frame are one slice of it, see _spawned
+        self.spawns = sorted((bug for _, bug in self.bugs.iteritems()), key=lambda bug: bug.frame)
+        self.spawnFrames = [bug.frame for bug in self.spawns]
+
+        # 'numpy' moves and targets all bugs of a frame in batched operations
+        self.engine = None
+        if engine == 'numpy':
+            from models.vectorized import VectorizedEngine
+            self.engine = VectorizedEngine(self)
+        elif engine != 'object':
+            raise GameException('Unknown engine %s' % engine)
 
     def __repr__(self):
         return json.dumps(vars(self))
@@ -45,195 +96,84 @@ class GameHandler(object):
     def __str__(self):
         return json.dumps(vars(self))
 
+    def snapshot(self, life=None, money=None):
+        if life is None:
+            life = self.life
+        if money is None:
+            money = self.money
+
+        if self.profiler.enabled:
+            self.profiler.count('snapshots')
+        if self.engine is not None:
+            self.engine.sync()
+        return GameState(life, money, self.towers, self.bugs, self.health, self.stepTable)
+
+    def restore(self, state):
+        self.targets = None
+        life, money = state.restore(self.towers, self.bugs)
+        if self.engine is not None:
+            self.engine.load()
+        return life, money
+
     def _readInputFile(self):
-        with open(self.inputFile, 'r') as f:
-            section = 0
-            for line in f:
-                if line == '\n':
-                    section += 1
-                    continue
+        self.level = readLevel(self.inputFile, cache=self.cache)
 
-                if section == 0:
-                    self.__readVars(line)
-                elif section == 1:
-                    self.__readBug(line)
-                else:
-                    self.__readTable(line)
-
-    def __readVars(self, line):
-        if 'life' in line:
-            self.life = int(line.split('=')[-1])
-        elif 'money' in line:
-            self.money = int(line.split('=')[-1])
-        elif 'range' in line:
-            self.towerRange = int(line.split('=')[-1])
-        elif 'cost' in line:
-            self.towerCost = int(line.split('=')[-1])
-        elif 'reward' in line:
-            self.reward = int(line.split('=')[-1])
-
-    def __readBug(self, line):
-        line = line.split()
-        bugName, colorsList, frame = line[0], line[1 : -1], line[-1]
-        frame = int(frame.split('=')[-1])
-
-        bug = Bug(name=bugName, frame=frame)
-        for color in colorsList:
-            colorName, value = color.split('=')
-            bug.colors[colorName] = int(value)
-            
-            # add color to list
-            self.colors.append(colorName)
-
-        self.bugs[bug.name] = bug
-
-    def __readTable(self, line):
-        if 'E' in line:
-            x = len(self.table)
-            y = line.split().index('E')
-            self.road[(None, None)] = (x, y)
-
-        self.table.append(line.split())
-
-    def _buildRoad(self, start=(None, None)):
-        start = self.road[start]
-        dx = [-1, 1, 0, 0]
-        dy = [0, 0, 1, -1]
-
-        for x, y in zip(dx, dy):
-            try:
-                if (self.table[start[0] + x][start[1] + y] in '1X' and 
-                    (start[0] + x, start[1] + y) not in self.road
-                ):
-                    
-                    self.road[start] = (start[0] + x, start[1] + y)
-                    self._buildRoad(start)
-            except IndexError:
-                pass
-        
+        self.life = self.level.life
+        self.money = self.level.money
+        self.towerRange = self.level.towerRange
+        self.towerCost = self.level.towerCost
+        self.reward = self.level.reward
 
-    def _readOutputFile(self):
-        with open(self.outputFile, 'r') as f:
-            action = None
-            tower = None
-            shoot = None
-
-            for line in f:
-                if len(line) <= 5:
-                    if tower:
-                        self.towers[tower.name] = tower
-                        self.actions.append(tower)
-                    elif shoot:
-                        self.actions.append(shoot)
-
-                    tower = None
-                    shoot = None
-                    action = None
-                    continue
-                elif 'action' in line:
-                    action = line.split('=')[-1].strip()
-                    if action == 'new_tower':
-                        tower = Tower()
-                    else:
-                        shoot = Shoot()
-                    continue
+        for color in self.level.colors:
+            self.health.intern(color)
+        for name, frame, colors in self.level.bugs():
+            bug = Bug(name=name, frame=frame, health=self.health, stepTable=self.stepTable)
+            bug.colors.update(colors)
+            self.bugs[bug.name] = bug
 
-                if 'frame' in line:
-                    frame = int(line.split('=')[-1])
-                    if tower:
-                        tower.frame = frame
-                    else:
-                        shoot.frame = frame
-                    continue
+        self.table = self.level.table
+        self.entrance = self.level.entrance
 
-                if action == 'new_tower':
-                    if 'name' in line:
-                        tower.name = line.split('=')[-1].strip()
-                        continue
-                    elif 'position' in line:
-                        p = [int(x) for x in line.split('=')[-1].split(',')]
-                        tower.x = p[1]
-                        tower.y = p[0]
-                        continue
-                    elif 'colors' in line:
-                        colorsList = line.split('=')[-1].split(',')
-                        for color in colorsList:
-                            name, value = color.split(':')
-                            tower.colors[name] = int(value)
-                        continue
-                   
-
-                elif action == 'shoot':
-                    if 'tower_name' in line:
-                        shoot.towerName = line.split('=')[-1].strip()
-                        continue
-                    elif 'bug_name' in line:
-                        shoot.bugName = line.split('=')[-1].strip()
-                        continue
-
-            if tower:
-                self.towers[tower.name] = tower
-                self.actions.append(tower)
-            elif shoot:
-                self.actions.append(shoot)
+    def _buildRoad(self):
+        self.road = self.level.road
 
-    def _getBestTowerPositions(self):
-        towerHit = {}
+    def _readOutputFile(self):
+        for action in readActions(self.outputFile):
+            if isinstance(action, Tower):
+                self.towers[action.name] = action
+            self.actions.append(action)
 
-        for point in self.road.values():
-            if self.table[point[0]][point[1]] == 'X':
-                continue
-            for i in xrange(point[0] - self.towerRange, point[0] + self.towerRange + 1):
-                for j in xrange(point[1] - self.towerRange, point[1] + self.towerRange + 1):
-                    if 0 <= i and i < len(self.table) and 0 <= j and j < len(self.table[0]) and self.table[i][j] == '0':
-                        try:
-                            towerHit[(i, j)] += 1
-                        except KeyError:
-                            towerHit[(i, j)] = 1
+    def validateOutput(self):
+        """Replay the solution in `outputFile`, return the final (life, money)."""
+        return Replay(self.level).run(readActions(self.outputFile))
 
-        positions = sorted(towerHit.items(), key=lambda item: item[1])
-        for position, value in positions:
-            self.bestTowerPositions.append(position)
+    def _getBestTowerPositions(self):
+        # road cells covered by every buildable position, reused by targeting
+        self.coverage = Coverage(self.table, self.road, self.towerRange)
+        self.bestTowerPositions = self.coverage.ranked()
+        # frames each bug spends in range of each buildable cell
+        self.timeline = ExposureTimeline(self.coverage, self.level.names, self.level.frames)
 
 
     def printOutput(self, actions):
-        with open(self.outputFile, 'a') as f:
-            for action in actions:
-                if isinstance(action, Tower):
-                    f.write('action=new_tower\n')
-                    f.write('frame=%s\n' % action.frame)
-                    f.write('name=%s\n' % (action.name))
-                    f.write('position=%s,%s\n' % (action.y, action.x))
-                    f.write('colors=%s\n' % ','.join(['%s:%s' % (key, value) for key, value in action.colors.iteritems() if value > 0]))
-                elif isinstance(action, Shoot):
-                    f.write('action=shoot\n')
-                    f.write('frame=%s\n' % action.frame)
-                    f.write('tower_name=%s\n' % action.towerName)
-                    f.write('bug_name=%s\n' % action.bugName)
-
-                f.write('\n')
+        self.writer.write(actions)
 
     def shootBug(self, tower, bug, do_damage):
-        colateral = 0
-        bugLife = bug.life
-        for color, value in tower.colors.iteritems():
-            new_value = bug.colors.get(color, 0) - value
-            if new_value < 0:
-                colateral -= new_value
-                new_value = 0
-            bugLife -= bug.colors.get(color, 0) - new_value
-            if do_damage:
-                bug.colors[color] = new_value
-
         if not do_damage:
-            return colateral, bugLife
-        return colateral
+            return bug.health.preview(bug.row, tower.colors)
+        return bug.health.shoot(bug.row, tower.colors)
 
-    def bestTarget(self, tower, backupBugs, life, frame):
+    def bestTarget(self, tower, backupBugs, life, frame, index=None):
+        # reference targeting, planShots picks the same bug through TargetQueues
         target = None
         maxSavedLife = 0
 
-        for _, bug in backupBugs.iteritems():
+        if index is None:
+            bugs = backupBugs.itervalues()
+        else:
+            bugs = index.near(self.coverage.reach(tower.x, tower.y))
+
+        for bug in bugs:
             # if bug is dead or not in game, continue
             if not bug.isAlive or bug.frame > frame:
                 continue
@@ -258,6 +198,23 @@ class GameHandler(object):
 
         return target
 
+    def shotMatrix(self, towers=None, bugs=None):
+        """Shots to kill, total collateral and clean shots of every tower
+        against every bug at its current health, see models/shots.py.
+
+        Defaults to all towers by name and all bugs in iteration order,
+        returns (tower names, bug names, shots, collateral, clean).
+        """
+        from models.shots import shotMatrix
+
+        towers = towers if towers is not None else [tower for _, tower in sorted(self.towers.iteritems())]
+        bugs = bugs if bugs is not None else [bug for _, bug in self.bugs.iteritems()]
+        if self.engine is not None:
+            self.engine.sync()
+
+        shots, collateral, clean = shotMatrix(self.health, [tower.colors for tower in towers], [bug.row for bug in bugs])
+        return [tower.name for tower in towers], [bug.name for bug in bugs], shots, collateral, clean
+
     def executeAction(self, action, life, money, frame):
         if action.frame != frame:
             return life, money
@@ -287,66 +244,215 @@ class GameHandler(object):
                 raise GameException('Bug #%s is too far from tower #%s' % (bug.name, tower.name))   
 
             colateral = self.shootBug(tower, bug, True)
+            if self.profiler.enabled:
+                self.profiler.count('shots')
 
             if colateral > 0:
                 life -= colateral
-                print '#%s extra kill by #%s life=%s, money=%s' % (action.bugName, action.towerName, life, money)
+                if self.events.enabled(INFO):
+                    self.events.info('collateral', frame=frame, tower=tower.name, bug=bug.name, damage=colateral, life=life)
 
             if bug.life == 0:
                 money += self.reward
-                print 'Bug #%s was killed by tower #%s' % (action.bugName, action.towerName)
+                if self.events.enabled(INFO):
+                    self.events.info('kill', frame=frame, tower=tower.name, bug=bug.name, money=money)
 
-            print 'Bug #{0} was shot.'.format(bug.name), vars(bug)
+            if self.events.enabled(DEBUG):
+                self.events.debug('shot', frame=frame, tower=tower.name, bug=bug.name, position='%s,%s' % (bug.y, bug.x), health=bug.life)
 
         return life, money 
 
     def nextGameState(self, actions, life, money, frame):
-        bugsToRemove = []
+        if self.engine is not None:
+            return self.engine.nextGameState(actions, life, money, frame)
 
-        # move active bugs
-        for _, bug in self.bugs.iteritems():
-            if not bug.isAlive:
+        bugs = self.bugs
+        leaked = []
+        moved = 0
+
+        # move active bugs, only those spawned within a road length can be
+        for bug in self._spawned(frame - len(self.road), frame):
+            if not bug.isAlive or bugs.get(bug.name) is not bug:
                 continue
 
+            moved += 1
             try:
-                bug.move(frame)
+                bug.moveTo(frame)
             except KeyError:
-                life -= bug.life
-                print 'Bug #%s got to X with life=%s: %s' % (bug.name, bug.life, bug.colors)
-                bugsToRemove.append(bug.name)
+                leaked.append(bug)
 
-        for bugName in bugsToRemove:
-            self.bugs.pop(bugName)
+        life = self._leak(leaked, frame, life)
+        if self.profiler.enabled:
+            self.profiler.count('bugs moved', moved)
 
         for action in actions:
             life, money = self.executeAction(action, life, money, frame)
 
         return life, money
 
-    def findSolution(self):
-        frame = 0
-        life = self.life
-        money = self.money
+    def _spawned(self, first, last):
+        """Bugs spawned from frame `first` to `last`, in spawn order."""
+        return self.spawns[bisect_left(self.spawnFrames, first) : bisect_right(self.spawnFrames, last)]
+
+    def _leak(self, bugs, frame, life):
+        # `bugs` got to X: their life is lost and they leave the game
+        for bug in bugs:
+            life -= bug.life
+            if self.events.enabled(WARNING):
+                self.events.warning('leak', frame=frame, bug=bug.name, damage=bug.life, life=life)
+            self.bugs.pop(bug.name)
+        return life
+
+    def _moveAhead(self, frame):
+        # move the live bugs to `frame` in place, bugs at X stay there and
+        # stepsLeft == 0 keeps them out of targeting
+        for bug in self._spawned(frame - len(self.road), frame):
+            if bug.isAlive:
+                try:
+                    bug.moveTo(frame)
+                except KeyError:
+                    pass
 
-        actions = [
-            ## Map 1
-            # Tower('tower_0', 0, 1, 3, {'red': 40, 'blue': 0}),
-            # Tower('tower_1', 0, 2, 5, {'red': 33, 'blue': 0}),
-            # Tower('tower_2', 0, 3, 2, {'red': 36, 'blue': 0}),
-            # Tower('tower_3', 0, 0, 3, {'red': 11, 'blue': 7}),
-            # Tower('tower_4', 0, 1, 1, {'red': 37, 'blue': 14}),
+    def planShots(self, frame, life, money):
+        if self.engine is not None:
+            return self.engine.planShots(frame, life, money)
 
-            ## Map 2
-            Tower('tower_0', 0, self.bestTowerPositions[-28][0], ),
+        shoots = []
+        profiler = self.profiler
+        # rows the plan shot, rolled back once it is made
+        shot = []
 
-        ]
+        # TargetQueues reads ranges from the timeline, not bug positions, so
+        # only bestTarget needs the bugs moved one frame ahead
+        depth = len(profiler.stack)
+        state = None
+        try:
+            if self.checkTargets:
+                if profiler.enabled:
+                    profiler.start('lookahead')
+                state = self.snapshot(life, money)
+                self._moveAhead(frame)
+                if profiler.enabled:
+                    profiler.stop()
+            if profiler.enabled:
+                profiler.start('select')
+
+            # only recheck the candidates whose health or range changed
+            if self.targets is None:
+                self.targets = TargetQueues(self)
+            self.targets.shot.clear()
+            index = BugIndex(self.bugs) if self.checkTargets else None
+            for _, tower in self.towers.iteritems():
+                target = self.targets.best(tower, frame)
+                if self.checkTargets:
+                    expected = self.bestTarget(tower, self.bugs, life, frame, index)
+                    if target is not expected:
+                        raise GameException('Tower #%s targets %s at frame %s, bestTarget picks %s' % (
+                            tower.name, target and target.name, frame, expected and expected.name))
+                if target:
+                    if target.name not in self.targets.shot:
+                        self.targets.shot.add(target.name)
+                        shot.append(self.health.snapshotRow(target.row))
+                    self.shootBug(tower, target, True)
 
-        # numberOfTowers = 4
-        # for i in xrange(numberOfTowers):
-        #    t = Tower('tower_%s' % i, 0, self.bestTowerPositions[-i - 1][0], self.bestTowerPositions[-i - 1][1], {'red': randrange(0, 1600), 'blue': randrange(0, 600)})
-        #    actions.append(t)
+                    shoot = Shoot(frame, tower.name, target.name)
+                    shoots.append(shoot)
+                    # print vars(target)
+
+            if profiler.enabled:
+                profiler.stop()
+                profiler.start('rollback')
+        finally:
+            # roll back the lookahead only, the bugs dict and its order are untouched
+            if state is not None:
+                state.restore(self.towers, self.bugs)
+            else:
+                for row in shot:
+                    self.health.restoreRow(row)
+            if profiler.enabled:
+                profiler.unwind(depth)
+
+        return shoots
+
+    def shotOptions(self, frame, limit):
+        """Up to `limit` zero collateral targets per tower at `frame`, most
+        damage first, each tower on its own."""
+        options = {}
+
+        state = self.snapshot()
+        self._moveAhead(frame)
+
+        index = BugIndex(self.bugs)
+        for _, tower in self.towers.iteritems():
+            targets = []
+            for bug in index.near(self.coverage.reach(tower.x, tower.y)):
+                if not bug.isAlive or bug.frame > frame or bug.stepsLeft == 0:
+                    continue
+                if max(abs(bug.x - tower.x), abs(bug.y - tower.y)) > self.towerRange:
+                    continue
 
+                colateral, lifeAfterShot = self.shootBug(tower, bug, False)
+                if colateral == 0 and lifeAfterShot < bug.life:
+                    targets.append((lifeAfterShot - bug.life, bug.name))
 
+            if targets:
+                options[tower.name] = [name for _, name in sorted(targets)[:limit]]
+
+        self.restore(state)
+
+        return options
+
+    def findSolution(self):
+        # one buffered handle per run, the solution only lands in place if it completes
+        with SolutionWriter(self.outputFile) as self.writer:
+            try:
+                return self._play(self.strategy)
+            finally:
+                self.writer = None
+
+    def searchSolution(self, width=8, branching=2):
+        """Like `findSolution`, with targeting from a `BeamSearch` of `width`
+        lines of play instead of the greedy plan."""
+        life, money, frames, actions = BeamSearch(self, self.strategy, width, branching).run()
+
+        with SolutionWriter(self.outputFile) as self.writer:
+            try:
+                self.printOutput(actions)
+            finally:
+                self.writer = None
+
+        return life, money, frames
+
+    def simulate(self, strategy):
+        """Play `strategy` headless and roll the game back afterwards.
+
+        Nothing is written, logged or profiled and the game runs to the end
+        even once life drops to zero, so the final life also ranks losing
+        strategies.
+        """
+        # swapped before the snapshot, which the profiler would count too
+        writer, events, profiler = self.writer, self.events, self.profiler
+        self.writer, self.events, self.profiler = None, EventLog(), Profiler()
+        try:
+            state = self.snapshot()
+            try:
+                return self._play(strategy, stopOnGameOver=False)
+            finally:
+                self.restore(state)
+        finally:
+            self.writer, self.events, self.profiler = writer, events, profiler
+
+    def _play(self, strategy, stopOnGameOver=True):
+        if self.simulation == 'events':
+            return self.playEvents(strategy, stopOnGameOver)
+        return self.play(strategy, stopOnGameOver)
+
+    def play(self, strategy, stopOnGameOver=True):
+        frame = 0
+        life = self.life
+        money = self.money
+
+        actions = strategy.placeTowers(self)
         for tower in actions:
             self.towers[tower.name] = tower
 
@@ -356,47 +462,191 @@ class GameHandler(object):
                 lastFrame = bug.frame
 
         for frame in xrange(len(self.road) + lastFrame + 1):
-            print '---------------------------- FRAME {0} ----------------------'.format(frame)
+            life, money, actions = self._playFrame(strategy, frame, life, money, actions, stopOnGameOver)
+
+        return life, money, frame + 1
+
+    def playEvents(self, strategy, stopOnGameOver=True):
+        """`play` that jumps between the frames where something can happen.
+
+        Bug positions only depend on the frame, so a frame where no tower has
+        a live bug in range, no bug gets to X and the strategy builds nothing
+        plans no shots and changes nothing but positions. Those frames are
+        skipped: a heap holds spawn-time range entries from `timeline`, leaks
+        and build frames, and a frame is followed by the next one only while
+        some tower still has a live bug in range. A leak frame with nothing
+        in range only takes the life of the bugs at X, without planning. The
+        actions are the same as `play`, at a cost that follows the events
+        instead of the frames.
+        """
+        life = self.life
+        money = self.money
 
-            backupBugs = deepcopy(self.bugs)
-            for _, bug in backupBugs.iteritems():
-                try:
-                    bug.move(frame) 
-                except KeyError:
-                    bug.colors = {}
+        actions = strategy.placeTowers(self)
+        for tower in actions:
+            self.towers[tower.name] = tower
 
-            for _, tower in self.towers.iteritems():
-                target = self.bestTarget(tower, backupBugs, life, frame)
-                if target:
-                    self.shootBug(tower, target, True)
+        lastFrame = 0
+        for _, bug in self.bugs.iteritems():
+            if lastFrame < bug.frame:
+                lastFrame = bug.frame
+        end = len(self.road) + lastFrame
 
-                    shoot = Shoot(frame, tower.name, target.name)
-                    actions.append(shoot)
-                    # print vars(target)
+        # (frame, kind): PLAY frames are played whatever is in range, LEAK
+        # frames have bugs get to X and RANGE frames a bug come in range,
+        # both are only played when some tower has a live bug in range
+        queue = [(0, PLAY), (end, LEAK)]
+        for _, bug in self.bugs.iteritems():
+            queue.append((bug.frame + len(self.road), LEAK))
+        for frame in strategy.buildFrames(self):
+            queue.append((frame, PLAY))
+        heapq.heapify(queue)
+        for _, tower in self.towers.iteritems():
+            self._queueExposure(queue, tower, 0)
+
+        # last frame visited, and last one played with the bugs moved
+        previous = played = -1
+        while queue:
+            frame, kind = heapq.heappop(queue)
+            if frame <= previous or frame > end:
+                continue
+            engaged = kind == PLAY or self._engaged(frame)
+            if not engaged and kind == RANGE:
+                continue
 
+            if not engaged:
+                life, money = self._leakFrame(frame, life, money, stopOnGameOver)
+                previous = frame
+                continue
 
-            print actions
-            self.printOutput(actions)
+            if frame > played + 1:
+                self._skipTo(frame - 1)
+
+            towers = len(self.towers)
+            life, money, actions = self._playFrame(strategy, frame, life, money, actions, stopOnGameOver)
+            previous = played = frame
+
+            # towers built this frame shoot from the next one on
+            if len(self.towers) != towers:
+                for _, tower in self.towers.iteritems():
+                    if tower.frame == frame:
+                        self._queueExposure(queue, tower, frame + 1)
+            if self._engaged(frame + 1):
+                heapq.heappush(queue, (frame + 1, RANGE))
+
+        return life, money, end + 1
+
+    def _queueExposure(self, queue, tower, start):
+        for _, first, last in self.timeline.intervals(tower.x, tower.y):
+            if last >= start:
+                heapq.heappush(queue, (max(first, start), RANGE))
+
+    def _engaged(self, frame):
+        # any tower with a live bug in range
+        for _, tower in self.towers.iteritems():
+            for name in self.timeline.exposed(tower.x, tower.y, frame):
+                bug = self.bugs.get(name)
+                if bug is not None and bug.isAlive:
+                    return True
+        return False
+
+    def _skipTo(self, frame):
+        # put live bugs where the skipped moves would have left them, no bug
+        # gets to X on a skipped frame
+        if self.engine is not None:
+            return self.engine.skipTo(frame)
+        for bug in self._spawned(frame - len(self.road) + 1, frame):
+            if bug.isAlive:
+                bug.moveTo(frame)
+
+    def _leakFrame(self, frame, life, money, stopOnGameOver):
+        # a frame with nothing in range or built: only the bugs at X count
+        if self.engine is not None:
+            life, money = self.engine.nextGameState([], life, money, frame)
+        else:
+            length = len(self.road)
+            leaked = [bug for bug in self._spawned(frame - length, frame - length)
+                      if bug.isAlive and self.bugs.get(bug.name) is bug]
+            life = self._leak(leaked, frame, life)
+
+        self._endFrame(frame, life, money, stopOnGameOver)
+        return life, money
 
+    def _playFrame(self, strategy, frame, life, money, actions, stopOnGameOver):
+        profiler = self.profiler
+        # a GameException mid-frame must not leave phases open on the stack
+        depth = len(profiler.stack)
+        try:
+            if profiler.enabled:
+                profiler.start('frame')
+                profiler.start('target')
+            actions.extend(strategy.target(self, frame, life, money))
+            if profiler.enabled:
+                profiler.stop()
+                profiler.start('build')
+            actions = strategy.build(self, frame, actions)
+
+            # towers built mid-game shoot from the next frame's plan on
+            for action in actions:
+                if isinstance(action, Tower):
+                    self.towers[action.name] = action
+
+            if self.events.enabled(DEBUG):
+                self.events.debug('actions', frame=frame, actions=actions)
+            if profiler.enabled:
+                profiler.stop()
+                profiler.start('write')
+            if self.writer is not None:
+                self.printOutput(actions)
+
+            if profiler.enabled:
+                profiler.stop()
+                profiler.start('state')
             life, money = self.nextGameState(actions, life, money, frame)
+            if profiler.enabled:
+                profiler.stop()
+                profiler.endFrame(profiler.stop())
+        finally:
+            if profiler.enabled:
+                profiler.unwind(depth)
 
-            print 'after actions: life={0} money={1}'.format(life, money)
-
-            if life <= 0:
-                raise GameException('Game Over. life={0} money={1} frame={2}'.format(life, money, frame))
+        self._endFrame(frame, life, money, stopOnGameOver)
+        return life, money, []
 
-            actions = []
+    def _endFrame(self, frame, life, money, stopOnGameOver):
+        if self.events.enabled(INFO):
+            self.events.info('frame', frame=frame, life=life, money=money)
 
-            print '\n'
+        if life <= 0 and stopOnGameOver:
+            raise GameException('Game Over. life={0} money={1} frame={2}'.format(life, money, frame))
 
 if __name__ == '__main__':
-    if len(sys.argv) == 1:
+    # --log=debug|info|warning turns on the event log, --cache the level cache,
+    # --simulation=events skips the idle frames, --beam=N searches N lines of play,
+    # --profile=file.json|file.folded dumps per-phase timings, --shot-cache=N memoizes
+    # the last N shot outcomes, --check-targets compares every pick against bestTarget,
+    # --engine=numpy batches each frame
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    levels = [arg.split('=')[-1] for arg in sys.argv[1:] if arg.startswith('--log=')]
+    simulations = [arg.split('=')[-1] for arg in sys.argv[1:] if arg.startswith('--simulation=')]
+    beams = [int(arg.split('=')[-1]) for arg in sys.argv[1:] if arg.startswith('--beam=')]
+    profiles = [arg.split('=', 1)[-1] for arg in sys.argv[1:] if arg.startswith('--profile=')]
+    shotCaches = [int(arg.split('=')[-1]) for arg in sys.argv[1:] if arg.startswith('--shot-cache=')]
+    engines = [arg.split('=')[-1] for arg in sys.argv[1:] if arg.startswith('--engine=')]
+    cache = '--cache' in sys.argv
+
+    if len(args) == 0:
         print 'No input file'
     else:
-        inputFile = '%s' % sys.argv[1]
-        outputFile = 'output/%s_solution' % sys.argv[1].split('/')[-1]
+        inputFile = '%s' % args[0]
+        outputFile = 'output/%s_solution' % args[0].split('/')[-1]
+        engine = engines[-1] if engines else 'object'
+        events = EventLog(LEVELS[levels[-1]]) if levels else EventLog()
         
-        game = GameHandler(inputFile=inputFile, outputFile=outputFile)
+        game = GameHandler(inputFile=inputFile, outputFile=outputFile, engine=engine, events=events, cache=cache,
+                           simulation=simulations[-1] if simulations else 'frames', profiler=Profiler(bool(profiles)),
+                           shotCache=ShotCache(shotCaches[-1]) if shotCaches else None,
+                           checkTargets='--check-targets' in sys.argv)
 
         table = deepcopy(game.table)
         positions = deepcopy(game.bestTowerPositions)
@@ -408,21 +658,14 @@ if __name__ == '__main__':
         for row in table:
             print '\t'.join(row)
 
-
-        for _, bug1 in game.bugs.iteritems():
-            for _, bug2 in game.bugs.iteritems():
-                if bug1.name != bug2.name:
-                    print bug1.name, '%', bug2.name
-                    for color, value in bug1.colors.iteritems():
-                        k = bug2.colors.get(color, 0)
-                        #print color, float(value) / k, float(value) % k
-                    
-
-
+        state = game.snapshot()
         while True:
-            gameCopy = deepcopy(game)
+            game.restore(state)
             try:
-                print gameCopy.findSolution()
+                if beams:
+                    print game.searchSolution(width=beams[-1])
+                else:
+                    print game.findSolution()
             except GameException as e:
                 print e.message
                 break
@@ -430,3 +673,8 @@ if __name__ == '__main__':
                 print '\n\n\nEvrika!!!!!!!!!!!!!\n\n'
                 break
 
+        if profiles:
+            game.profiler.dump(profiles[-1])
+        if shotCaches:
+            print 'shot cache %s' % json.dumps(game.health.shots.stats(), sort_keys=True)
+